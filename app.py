@@ -1,10 +1,26 @@
-import sqlite3
 import sys
 import os
-from flask import Flask, render_template, request, jsonify
-from project.info_scraper import scrape_case_info # Import the info scraper function
-from project.backup_scraper import scrape_case_info_backup # Import backup scraper
-from project.scarp import get_pdf_url # Import the PDF URL function
+import json
+import time
+from flask import Flask, Response, g, render_template, request, jsonify, send_file, stream_with_context, url_for
+from project.engines import get_router, load_engines, loaded_engines # HTTP-first scraping with Playwright fallback (modules load on first scrape)
+from project.batch import BatchRunner, BATCH_MAX_CASES, BATCH_STREAM_IDLE_SECONDS, parse_cases
+from project.singleflight import SingleFlight
+from project.executor import JobTimeout, QueueFull, ScrapeExecutor
+from project.db import SCHEMA_VERSION, get_connection, migrate
+from project import history as history_log
+from project.orders import fetch_orders, store_orders
+from project.cache_policy import BackgroundRefresher, classify, evaluate, now_iso
+from project.browser_pool import get_pool, pool_stats
+from project.http_sessions import get_session_pool
+from project.ratelimit import limiter_stats
+from project.timing import StepTimer, recent, step, step_summary
+from project import metrics
+from project.pdf_store import PDF_DOWNLOAD, PdfStore
+from project.watcher import WATCH_ENABLED, Watcher
+from project.catalog import Catalog
+from project.leases import LeaseTable, case_key
+from project.startup import PREWARM, Startup
 
 # Set UTF-8 encoding for Windows
 if sys.platform.startswith('win'):
@@ -13,11 +29,41 @@ if sys.platform.startswith('win'):
     sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
 
 app = Flask(__name__)
-DATABASE = 'history.db' # Use relative path
+startup = Startup() # Start-up progress for /readyz
+DATABASE = os.environ.get('HISTORY_DB', 'history.db') # Relative path by default
+scrape_flights = SingleFlight() # In-flight scrapes keyed on the case
+cache_refresher = BackgroundRefresher() # Stale-while-revalidate refreshes
+scrape_executor = ScrapeExecutor() # Bounded workers + queue for all scrapes
+pdf_store = PdfStore(DATABASE) # Downloaded order PDFs (PDF_DOWNLOAD=1)
+pdf_prefetcher = BackgroundRefresher() # Downloads PDFs of freshly scraped cases
+catalog = Catalog() # Valid case types / years from the court's form
+scrape_leases = LeaseTable(DATABASE) # One process at a time scrapes a given case (workers / hosts sharing the db)
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def count_request(response):
+    endpoint = request.endpoint or 'unknown'
+    metrics.HTTP_REQUESTS.inc(endpoint=endpoint, status=str(response.status_code))
+    if 'request_started' in g:
+        metrics.HTTP_SECONDS.observe(time.perf_counter() - g.request_started, endpoint=endpoint)
+    return response
 
 @app.route('/')
 def index():
-    return render_template('index.html')
+    return render_template('index.html', case_types=catalog.case_types, years=catalog.years)
+
+@app.route('/catalog')
+def case_catalog():
+    """Case types and years the court's form accepts"""
+    return jsonify(catalog.to_dict())
+
+def invalid_case(case_type, case_number, case_year):
+    """Error payload for input the court's form would not accept (checked before any scraping)"""
+    error = catalog.validate(case_type, case_number, case_year)
+    return {'success': False, 'error': error} if error else None
 
 @app.route('/scrape', methods=['POST'])
 def scrape_case():
@@ -27,18 +73,118 @@ def scrape_case():
 
     if not case_type or not case_number or not case_year:
         return jsonify({"error": "Please fill in all fields."}), 400
+    invalid = invalid_case(case_type, case_number, case_year)
+    if invalid:
+        return jsonify(invalid), 400
 
     try:
-        # First check if case already exists in database
-        conn = get_db()
-        cursor = conn.cursor()
-        cursor.execute("SELECT status, parties, last_date, next_date, court_no FROM scrape_history WHERE case_type = ? AND case_number = ? AND case_year = ? AND status != 'Not Found' AND status NOT LIKE 'Error:%' ORDER BY rowid DESC LIMIT 1",
-                       (case_type, case_number, case_year))
-        existing_case = cursor.fetchone()
-        
-        if existing_case:
+        payload = lookup_case_cached(case_type, case_number, case_year)
+        if PDF_DOWNLOAD and payload.get('success') and not payload.get('from_cache'):
+            case_info = payload['case_info']
+            payload = dict(payload, case_info=dict(case_info, pdf_local=local_pdf(case_info.get('pdf_link'))))
+        return jsonify(payload)
+    except QueueFull as e:
+        return busy_response(e)
+    except JobTimeout:
+        return jsonify({'success': False, 'error': 'The court website took too long to respond. Please try again.'}), 504
+
+def busy_response(e):
+    """503 + Retry-After when the scrape queue is full"""
+    response = jsonify({
+        'success': False,
+        'error': 'Too many lookups in progress. Please try again shortly.',
+        'retry_after': e.retry_after
+    })
+    response.status_code = 503
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response
+
+def lookup_case_cached(case_type, case_number, case_year, block=False):
+    """
+    Cache first, otherwise scrape and store the result.
+    Returns the /scrape JSON payload (also used by batch jobs).
+    Raises QueueFull / JobTimeout from the scrape executor (`block` waits
+    for queue room instead of failing fast).
+    """
+    timer = StepTimer("request")
+    try:
+        payload = _lookup_case_cached(case_type, case_number, case_year, block, timer)
+    except QueueFull:
+        timer.finish("busy")
+        raise
+    except JobTimeout:
+        timer.finish("timeout")
+        raise
+    timer.engine = payload.get('engine')
+    timer.finish(request_outcome(payload))
+    return payload
+
+def request_outcome(payload):
+    """Outcome label of a /scrape payload for the request timer"""
+    if payload.get('from_cache'):
+        return 'cache_hit'
+    if payload.get('success'):
+        return 'found'
+    # Not-found answers name the engine that gave them; errors don't
+    return 'not_found' if payload.get('engine') else 'error'
+
+def cached_rows(case_type, case_number, case_year):
+    """Latest row of any kind and latest row with case data for the case"""
+    conn = get_db()
+    cursor = conn.cursor()
+    cursor.execute("SELECT status, next_date, checked_at FROM case_history WHERE case_type = ? AND case_number = ? AND case_year = ? ORDER BY id DESC LIMIT 1",
+                   (case_type, case_number, case_year))
+    latest = cursor.fetchone()
+    cursor.execute("SELECT status, parties, last_date, next_date, court_no, checked_at FROM case_history WHERE case_type = ? AND case_number = ? AND case_year = ? AND status != 'Not Found' AND status NOT LIKE 'Error:%' ORDER BY id DESC LIMIT 1",
+                   (case_type, case_number, case_year))
+    return latest, cursor.fetchone()
+
+def _lookup_case_cached(case_type, case_number, case_year, block, timer):
+    try:
+        # First check what the database already knows about this case
+        with step(timer, "cache_check"):
+            payload = cached_payload(case_type, case_number, case_year)
+        if payload:
+            return payload
+
+        # Nothing usable in the database, scrape fresh data (both info and PDF)
+        return scrape_case_shared(case_type, case_number, case_year, block=block, timer=timer)
+    except (QueueFull, JobTimeout):
+        raise
+    except Exception as e:
+        print(f"Cache lookup error: {str(e)}")
+        return {
+            'success': False,
+            'error': f"An error occurred: {str(e)}",
+            'from_cache': False,
+            'cache_state': None,
+            'cache_age': None
+        }
+
+def cached_payload(case_type, case_number, case_year):
+    """/scrape payload from the database, or None when the case needs a fresh scrape"""
+    latest, existing_case = cached_rows(case_type, case_number, case_year)
+
+    # A recent 'Not Found' / error is remembered for a while (TTL_NEGATIVE / TTL_ERROR)
+    recent_failure = None
+    if latest and classify(latest[0]) in ('negative', 'error'):
+        freshness = evaluate(latest[0], latest[2])
+        if freshness['state'] == 'fresh':
+            recent_failure = (latest[0], freshness)
+
+    if existing_case:
+        freshness = evaluate(existing_case[0], existing_case[5], existing_case[3])
+        if freshness['state'] != 'expired' or recent_failure:
+            if freshness['state'] != 'fresh' and recent_failure:
+                # The last refresh just failed; keep serving what we have
+                freshness = dict(freshness, state='stale')
+            elif freshness['state'] == 'stale':
+                # Serve now, refresh in the background (stale-while-revalidate)
+                cache_refresher.refresh(
+                    (case_type, case_number, case_year),
+                    lambda: scrape_case_shared(case_type, case_number, case_year)
+                )
             # Case found in database, return cached data
-            conn.close()
             case_info = {
                 'case_identifier': f"{case_type} - {case_number} / {case_year}",
                 'status': existing_case[0],
@@ -48,82 +194,113 @@ def scrape_case():
                 'court_no': existing_case[4],
                 'pdf_link': None  # Will be fetched separately if needed
             }
-            return jsonify({
+            return {
                 'success': True,
                 'case_info': case_info,
-                'from_cache': True  # Indicate this came from database
-            })
-        
-        # Case not in database, scrape fresh data (both info and PDF)
-        conn.close()  # Close connection before scraping
-        
-        print(f"Scraping fresh data for: {case_type} {case_number} {case_year}")
-        
-        case_info = None
-        try:
-            print(f"Attempting to scrape with info_scraper for: {case_type} {case_number} {case_year}")
-            case_info = scrape_case_info(case_type, case_number, case_year, headless=True)
-            print(f"Info scraper result: {case_info}")
-            
-            if not case_info:
-                print("Info scraper returned None, trying backup scraper...")
-                case_info = scrape_case_info_backup(case_type, case_number, case_year)
-                print(f"Backup scraper result: {case_info}")
-                
-        except Exception as e:
-            print(f"Scraping error: {str(e)}")
-            print("Trying backup scraper...")
+                'from_cache': True,  # Indicate this came from database
+                'cache_state': freshness['state'],
+                'cache_age': freshness['age']
+            }
+    elif recent_failure:
+        status, freshness = recent_failure
+        error = "No case found for the provided details." if status == 'Not Found' else f"An error occurred: {status[len('Error:'):].strip()}"
+        return {
+            'success': False,
+            'error': error,
+            'from_cache': True,
+            'cache_state': freshness['state'],
+            'cache_age': freshness['age']
+        }
+    return None
+
+def scrape_case_shared(case_type, case_number, case_year, block=False, timer=None):
+    """
+    Scrape on the bounded scrape executor. Concurrent requests for the same
+    case share one scrape (timed on the `timer` of the request that started it),
+    and so do other app processes using the same database (scrape lease).
+    """
+    def run_scrape():
+        lease = case_key(case_type, case_number, case_year)
+        while not scrape_leases.claim(lease):
+            # Another process (or this one's watcher) is scraping this case; answer with what it stores
+            with step(timer, "lease_wait"):
+                if not scrape_leases.wait(lease, scrape_executor.job_timeout):
+                    raise JobTimeout("Another worker is still scraping this case")
+            payload = cached_payload(case_type, case_number, case_year)
+            if payload:
+                return payload
+            # Its lease expired without a result (crashed worker): take over
+
+        queued = time.perf_counter()
+
+        def job():
             try:
-                case_info = scrape_case_info_backup(case_type, case_number, case_year)
-                print(f"Backup scraper result: {case_info}")
-            except Exception as backup_e:
-                print(f"Backup scraper error: {str(backup_e)}")
-                case_info = None
+                if timer is not None:
+                    timer.add("queue_wait", time.perf_counter() - queued)
+                return scrape_and_store(case_type, case_number, case_year, timer)
+            finally:
+                scrape_leases.release(lease)
+
+        try:
+            return scrape_executor.run(job, block=block, on_skip=lambda: scrape_leases.release(lease))
+        except QueueFull:
+            scrape_leases.release(lease)
+            raise
+
+    payload, shared = scrape_flights.do(('scrape', case_type, case_number, case_year), run_scrape)
+    if shared:
+        payload = dict(payload, coalesced=True)
+    return payload
+
+def scrape_and_store(case_type, case_number, case_year, timer=None):
+    """Scrape the case, store the result in history and return the payload"""
+    try:
+        print(f"Scraping fresh data for: {case_type} {case_number} {case_year}")
         
-        # Also get PDF link if case info was found
-        pdf_link = None
-        if case_info:
-            try:
-                import time
-                time.sleep(2)  # Small delay between scrapers
-                pdf_link = get_pdf_url(case_type, case_number, case_year)
-                print(f"PDF link result: {pdf_link}")
-            except Exception as e:
-                print(f"PDF scraping error: {e}")
-                pdf_link = None
+        # HTTP engine first, Playwright only when the page needs a browser
+        with step(timer, "scrape"):
+            case_info, engine = get_router().lookup(case_type, case_number, case_year)
+        print(f"Lookup result ({engine} engine): {case_info}")
+        pdf_link = case_info.pop('pdf_link', None) if case_info else None
+        orders = case_info.pop('orders', None) if case_info else None
         
-        # Reconnect to database to store results
+        # Store results
         conn = get_db()
-        cursor = conn.cursor()
 
         if case_info:
             # Insert fresh data into history (including PDF link)
-            try:
-                cursor.execute("INSERT INTO scrape_history (case_type, case_number, case_year, status, parties, last_date, next_date, court_no, pdf_link) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
-                               (case_type, case_number, case_year, case_info.get('status', 'N/A'), case_info.get('parties', 'N/A'), case_info.get('last_hearing_date', 'N/A'), case_info.get('next_hearing_date', 'N/A'), case_info.get('court_no', 'N/A'), pdf_link))
-            except sqlite3.OperationalError:
-                # Fallback for older database schema without pdf_link column
-                cursor.execute("INSERT INTO scrape_history (case_type, case_number, case_year, status, parties, last_date, next_date, court_no) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-                               (case_type, case_number, case_year, case_info.get('status', 'N/A'), case_info.get('parties', 'N/A'), case_info.get('last_hearing_date', 'N/A'), case_info.get('next_hearing_date', 'N/A'), case_info.get('court_no', 'N/A')))
-            conn.commit()
-            conn.close()
+            with step(timer, "db_write"):
+                history_log.record_case(conn, case_type, case_number, case_year, case_info, pdf_link, now_iso())
+                # Only orders newer than the ones we already have are written
+                new_orders = store_orders(conn, case_type, case_number, case_year, orders)
+                conn.commit()
             # Add PDF link to case_info
             case_info['pdf_link'] = pdf_link
-            return jsonify({
+            if PDF_DOWNLOAD and pdf_link:
+                # Our copy is linked by /scrape once it's downloaded
+                pdf_prefetcher.refresh(pdf_link, lambda: pdf_store.fetch(pdf_link))
+            return {
                 'success': True,
                 'case_info': case_info,
-                'from_cache': False  # Indicate this was freshly scraped
-            })
+                'from_cache': False,  # Indicate this was freshly scraped
+                'cache_state': 'fresh',
+                'cache_age': 0,
+                'engine': engine,
+                'new_orders': len(new_orders)
+            }
         else:
             # Handle cases where scraping was successful but no data found for the input
-            cursor.execute("INSERT INTO scrape_history (case_type, case_number, case_year, status) VALUES (?, ?, ?, ?)",
-                           (case_type, case_number, case_year, "Not Found"))
-            conn.commit()
-            conn.close()
-            return jsonify({
+            with step(timer, "db_write"):
+                history_log.record_status(conn, case_type, case_number, case_year, "Not Found", now_iso())
+                conn.commit()
+            return {
                 'success': False,
-                'error': "No case found for the provided details."
-            })
+                'error': "No case found for the provided details.",
+                'from_cache': False,
+                'cache_state': 'fresh',
+                'cache_age': 0,
+                'engine': engine
+            }
     except Exception as e:
         # Log the actual error for debugging
         error_msg = f"Error during scraping: {str(e)}"
@@ -131,18 +308,107 @@ def scrape_case():
         
         try:
             conn = get_db()
-            cursor = conn.cursor()
-            cursor.execute("INSERT INTO scrape_history (case_type, case_number, case_year, status) VALUES (?, ?, ?, ?)",
-                           (case_type, case_number, case_year, f"Error: {str(e)[:50]}"))
+            history_log.record_status(conn, case_type, case_number, case_year, f"Error: {str(e)[:50]}", now_iso())
             conn.commit()
-            conn.close()
         except Exception as db_e:
             print(f"Database error: {str(db_e)}")
             
-        return jsonify({
+        return {
             'success': False,
-            'error': f"An error occurred: {str(e)}"
-        })
+            'error': f"An error occurred: {str(e)}",
+            'from_cache': False,
+            'cache_state': 'fresh',
+            'cache_age': 0
+        }
+
+@app.route('/batch', methods=['POST'])
+def batch_submit():
+    """Start a batch lookup; returns a job id right away"""
+    data = request.get_json(silent=True)
+    items = data.get('cases') if isinstance(data, dict) else data
+
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "Please provide a non-empty 'cases' list."}), 400
+    if len(items) > BATCH_MAX_CASES:
+        return jsonify({"error": f"At most {BATCH_MAX_CASES} cases per batch."}), 400
+
+    job = batch_runner.submit(parse_cases(items))
+    return jsonify({
+        'job_id': job.id,
+        'total': len(job.cases),
+        'status_url': url_for('batch_status', job_id=job.id),
+        'stream_url': url_for('batch_stream', job_id=job.id)
+    }), 202
+
+@app.route('/batch/<job_id>')
+def batch_status(job_id):
+    """Poll a batch job (add ?results=0 for counts only)"""
+    job = batch_runner.get(job_id)
+    if not job:
+        return jsonify({"error": "Unknown batch job."}), 404
+    return jsonify(job.to_dict(include_results=request.args.get('results') != '0'))
+
+@app.route('/batch/<job_id>/stream')
+def batch_stream(job_id):
+    """Stream batch results as NDJSON, one line per case as it completes"""
+    job = batch_runner.get(job_id)
+    if not job:
+        return jsonify({"error": "Unknown batch job."}), 404
+
+    def generate():
+        for line in job.iter_results(timeout=BATCH_STREAM_IDLE_SECONDS):
+            yield json.dumps(line) + "\n"
+
+    return Response(generate(), mimetype='application/x-ndjson')
+
+@app.route('/watch', methods=['GET', 'POST', 'DELETE'])
+def watch_list():
+    """
+    GET lists watched cases with their next check; POST / DELETE add or remove
+    cases (same body as /batch). Watched cases are re-scraped around their hearings.
+    """
+    if request.method == 'GET':
+        return jsonify({'cases': watcher.schedule()})
+
+    data = request.get_json(silent=True)
+    items = data.get('cases') if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "Please provide a non-empty 'cases' list."}), 400
+
+    parsed = parse_cases(items)
+    cases = [(case['case_type'], case['case_number'], case['case_year']) for case in parsed if case]
+    if request.method == 'POST':
+        cases = [case for case in cases if not invalid_case(*case)]
+    if request.method == 'DELETE':
+        return jsonify({'removed': watcher.remove(cases), 'invalid': len(parsed) - len(cases)})
+    return jsonify({'added': watcher.add(cases), 'invalid': len(parsed) - len(cases)})
+
+@app.route('/watch/events')
+def watch_events():
+    """Changes found on watched cases, oldest first; pass ?since=<last id> for newer ones"""
+    try:
+        since = int(request.args.get('since') or 0)
+    except ValueError:
+        return jsonify({"error": "Invalid since."}), 400
+    events = watcher.events(since)
+    return jsonify({
+        'events': events,
+        'next_since': events[-1]['id'] if events else since
+    })
+
+@app.route('/watch/events/stream')
+def watch_events_stream():
+    """The same events as NDJSON, pushed as they happen"""
+    try:
+        since = int(request.args.get('since') or 0)
+    except ValueError:
+        return jsonify({"error": "Invalid since."}), 400
+
+    def generate():
+        for event in watcher.iter_events(since):
+            yield json.dumps(event) + "\n"
+
+    return Response(generate(), mimetype='application/x-ndjson')
 
 @app.route('/get_pdf_url', methods=['POST'])
 def get_pdf_link():
@@ -152,45 +418,92 @@ def get_pdf_link():
 
     if not case_type or not case_number or not case_year:
         return jsonify({"error": "Please provide case details."}), 400
+    invalid = invalid_case(case_type, case_number, case_year)
+    if invalid:
+        return jsonify(invalid), 400
+
+    def stored_pdf_link():
+        cursor = get_db().execute("SELECT pdf_link FROM scrape_history WHERE case_type = ? AND case_number = ? AND case_year = ? AND pdf_link IS NOT NULL ORDER BY rowid DESC LIMIT 1",
+                                  (case_type, case_number, case_year))
+        result = cursor.fetchone()
+        return result[0] if result else None
 
     try:
         # Get PDF link from database first
-        conn = get_db()
-        cursor = conn.cursor()
-        cursor.execute("SELECT pdf_link FROM scrape_history WHERE case_type = ? AND case_number = ? AND case_year = ? AND pdf_link IS NOT NULL ORDER BY rowid DESC LIMIT 1",
-                       (case_type, case_number, case_year))
-        result = cursor.fetchone()
-        conn.close()
-        
-        if result and result[0]:
+        pdf_url = stored_pdf_link()
+        if not pdf_url:
+            # If not in database, scrape the case like /scrape does (one process per case,
+            # shared with concurrent requests); it stores the link, also when another worker scraped
+            payload = scrape_case_shared(case_type, case_number, case_year)
+            pdf_url = stored_pdf_link() if payload.get('success') else None
+        if not pdf_url:
             return jsonify({
-                'success': True,
-                'pdf_url': result[0]
+                'success': False,
+                'error': 'No PDF found for this case.'
             })
-        else:
-            # If not in database, scrape fresh
-            pdf_url = get_pdf_url(case_type, case_number, case_year)
-            if pdf_url:
+        if PDF_DOWNLOAD:
+            # Serve our stored copy once it's downloaded; until then (or if the
+            # download fails) the court link works, and the request doesn't wait
+            pdf_local = local_pdf(pdf_url)
+            if pdf_local:
                 return jsonify({
                     'success': True,
-                    'pdf_url': pdf_url
-                })
-            else:
-                return jsonify({
-                    'success': False,
-                    'error': 'No PDF found for this case.'
+                    'pdf_url': pdf_local,
+                    'source_url': pdf_url
                 })
+        return jsonify({
+            'success': True,
+            'pdf_url': pdf_url
+        })
+    except QueueFull as e:
+        return busy_response(e)
+    except JobTimeout:
+        return jsonify({'success': False, 'error': 'The court website took too long to respond. Please try again.'}), 504
     except Exception as e:
         return jsonify({
             'success': False,
             'error': 'Error retrieving PDF. Please try again.'
         })
 
+def local_pdf(pdf_link):
+    """Our URL for an already downloaded PDF; otherwise queue the download and return None"""
+    if not pdf_link:
+        return None
+    sha256 = pdf_store.lookup(pdf_link)
+    if sha256:
+        return url_for('serve_pdf', sha256=sha256)
+    pdf_prefetcher.refresh(pdf_link, lambda: pdf_store.fetch(pdf_link))
+    return None
+
+@app.route('/pdf/<sha256>')
+def serve_pdf(sha256):
+    """Stored order PDF with Range / If-None-Match support (the ETag is the content hash)"""
+    path = pdf_store.open(sha256)
+    if not path:
+        return jsonify({"error": "Unknown PDF."}), 404
+    response = send_file(path, mimetype='application/pdf', conditional=True, etag=sha256,
+                         download_name=f"order_{sha256[:12]}.pdf", max_age=365 * 24 * 3600)
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+@app.route('/orders')
+def case_orders():
+    """Every stored order of a case, newest first (filled in by /scrape)"""
+    case_type = request.args.get('case_type')
+    case_number = request.args.get('case_number')
+    case_year = request.args.get('case_year')
+
+    if not case_type or not case_number or not case_year:
+        return jsonify({"error": "Please provide case details."}), 400
+
+    orders = fetch_orders(get_db(), case_type, case_number, case_year)
+    return jsonify({'orders': orders})
+
 @app.route('/test_pdf')
 def test_pdf():
     """Test route to check PDF functionality"""
     try:
-        pdf_url = get_pdf_url("CRL.A.", "1207", "2019")
+        pdf_url = get_router().pdf_url("CRL.A.", "1207", "2019")
         return jsonify({
             'success': True if pdf_url else False,
             'pdf_url': pdf_url,
@@ -204,27 +517,122 @@ def test_pdf():
 
 @app.route('/history')
 def history():
-    conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute("SELECT case_type, case_number, case_year, status, parties, last_date, next_date, court_no, pdf_link FROM scrape_history ORDER BY rowid DESC")
-    history_data = cursor.fetchall()
-    conn.close()
-    return jsonify(history_data)
+    """
+    Search history, newest first.
+    JSON pages of ?limit= rows (follow next_cursor with ?cursor=), or the whole
+    filtered history streamed with ?format=ndjson / ?format=csv.
+    Filters: case_type, case_year, status, since, until (scraped_at).
+    """
+    try:
+        filters = history_log.parse_filters(request.args)
+        limit = request.args.get('limit')
+        limit = int(limit) if limit else None
+    except ValueError:
+        return jsonify({"error": "Invalid cursor or limit."}), 400
+
+    output = request.args.get('format', 'json')
+    if output in ('ndjson', 'csv'):
+        rows = history_log.iter_rows(get_db(), filters, limit)
+        if output == 'csv':
+            return Response(stream_with_context(history_log.csv_lines(rows)), mimetype='text/csv',
+                            headers={'Content-Disposition': 'attachment; filename=history.csv'})
+        return Response(stream_with_context(history_log.ndjson_lines(rows)), mimetype='application/x-ndjson')
+
+    limit = max(1, min(limit or history_log.DEFAULT_LIMIT, history_log.MAX_LIMIT))
+    rows, next_cursor = history_log.fetch_page(get_db(), filters, limit)
+    return jsonify({
+        'columns': history_log.COLUMNS,
+        'rows': rows,
+        'next_cursor': next_cursor
+    })
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Prometheus text format: lookup/step histograms, request counters, queue gauges"""
+    queue = scrape_executor.snapshot()
+    gauges = metrics.gauge('scrape_queue_depth', 'Scrapes waiting for a worker.', [((), queue['queue_depth'])])
+    gauges += metrics.gauge('scrape_workers_busy', 'Scrape workers running a job.', [((), queue['busy'])])
+    gauges += metrics.gauge('browser_pool_busy', 'Browsers running a lookup.',
+                            [((str(pool['headless']).lower(),), pool['busy']) for pool in pool_stats()], ('headless',))
+    gauges += metrics.gauge('court_rate_limit', 'Current allowed requests per second to the court site.',
+                            [((host,), limiter['rate']) for host, limiter in limiter_stats().items()], ('host',))
+    return Response(metrics.render(gauges), mimetype='text/plain; version=0.0.4')
+
+@app.route('/healthz')
+def healthz():
+    """Liveness: the process is up and answering"""
+    return jsonify({'status': 'ok', 'state': startup.state})
+
+@app.route('/readyz')
+def readyz():
+    """Readiness: schema migrated and (PREWARM=1) warm-up done; 503 until then"""
+    data = startup.snapshot()
+    data['schema_version'] = SCHEMA_VERSION
+    data['engines_loaded'] = loaded_engines()
+    try:
+        get_db().execute("SELECT 1 FROM scrape_history LIMIT 1")
+    except Exception as e:
+        data.update(ready=False, database_error=str(e))
+    return jsonify(data), 200 if data['ready'] else 503
+
+def prewarm_steps():
+    """PREWARM=1: scraper modules, the browser pool (if Playwright is an engine) and the case catalog"""
+    engines = [engine.name for engine in get_router().engines]
+    steps = [('import_engines', lambda: load_engines(engines))]
+    if 'playwright' in engines:
+        steps.append(('browser_pool', lambda: get_pool(headless=True).warm()))
+    steps.append(('catalog', lambda: catalog.stale() and catalog.refresh()))
+    return steps
+
+@app.route('/stats')
+def stats():
+    """Runtime counters (engines, browser pool, step timings)"""
+    return jsonify({
+        'engines': get_router().stats(),
+        'scrape_queue': scrape_executor.snapshot(),
+        'singleflight': scrape_flights.snapshot(),
+        'cache_refresh': cache_refresher.snapshot(),
+        'browser_pools': pool_stats(),
+        'http_sessions': get_session_pool().snapshot(),
+        'rate_limits': limiter_stats(),
+        'pdf_store': pdf_store.snapshot(),
+        'pdf_prefetch': pdf_prefetcher.snapshot(),
+        'watcher': watcher.snapshot(),
+        'startup': startup.snapshot(),
+        'leases': scrape_leases.snapshot(),
+        'step_timings': step_summary(),
+        'recent_lookups': recent(20)
+    })
 
 def get_db():
-    db = sqlite3.connect(DATABASE)
-    cursor = db.cursor()
-    # Create table with all columns
-    cursor.execute("CREATE TABLE IF NOT EXISTS scrape_history (case_type TEXT, case_number TEXT, case_year TEXT, status TEXT, parties TEXT, last_date TEXT, next_date TEXT, court_no TEXT, pdf_link TEXT)")
-    
-    # Add pdf_link column if it doesn't exist (for existing databases)
+    """Per-thread connection; the schema is migrated once at startup"""
+    return get_connection(DATABASE)
+
+# Create / upgrade the schema once, before serving requests
+with startup.step('migrate'):
+    migrate(DATABASE)
+
+# Batch jobs wait for queue room instead of being turned away
+batch_runner = BatchRunner(lambda *case: invalid_case(*case) or lookup_case_cached(*case, block=True),
+                           db_path=DATABASE, leases=scrape_leases)
+
+def run_watch_check(job, on_skip):
+    """A watcher check on the scrape workers; the job releases its case lease itself"""
     try:
-        cursor.execute("ALTER TABLE scrape_history ADD COLUMN pdf_link TEXT")
-    except sqlite3.OperationalError:
-        pass  # Column already exists
-    
-    db.commit()
-    return db
+        return scrape_executor.run(job, block=True, on_skip=on_skip)
+    except QueueFull:
+        on_skip()
+        raise
+
+# Watched cases share the scrape workers with everyone else
+watcher = Watcher(DATABASE, lambda *case: get_router().lookup(*case), leases=scrape_leases, run_fn=run_watch_check)
+if WATCH_ENABLED:
+    watcher.start()
+
+if PREWARM:
+    startup.prewarm(prewarm_steps())
+else:
+    startup.mark_ready()
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
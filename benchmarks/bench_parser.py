@@ -0,0 +1,54 @@
+"""
+Parser throughput on saved pages, no network needed:
+
+    pip install pytest pytest-benchmark
+    python -m pytest benchmarks/bench_parser.py --benchmark-autosave
+    python -m pytest benchmarks/bench_parser.py --benchmark-compare --benchmark-compare-fail=mean:10%
+"""
+import sys
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bs4 import BeautifulSoup
+from project.parser import parse_order_pdf_links, parse_orders_page, parse_results_page, parse_row_html
+
+FIXTURES = Path(__file__).parent / "fixtures"
+RESULT_PAGE = (FIXTURES / "case_status_result.html").read_text(encoding="utf-8")
+NOT_FOUND_PAGE = (FIXTURES / "case_status_not_found.html").read_text(encoding="utf-8")
+ORDERS_PAGE = (FIXTURES / "orders_page.html").read_text(encoding="utf-8")
+ORDERS_URL = "https://delhihighcourt.nic.in/app/case-type-status-details/MTIwNw==/MjAxOQ==/Q1JMLkEu"
+# What the Playwright engine hands over: the outerHTML of the first result row
+ROW_HTML = str(BeautifulSoup(RESULT_PAGE, "html.parser").select_one("tbody tr"))
+
+
+def test_results_page(benchmark):
+    row = benchmark(parse_results_page, RESULT_PAGE)
+    assert row.status == "DISPOSED"
+    assert row.last_hearing_date == date(2023, 1, 23)
+    assert row.next_hearing_date is None
+    assert row.orders_link.endswith("Q1JMLkEu")
+
+
+def test_result_row_html(benchmark):
+    row = benchmark(parse_row_html, ROW_HTML)
+    assert row.case_identifier == "CRL.A. - 1207 / 2019"
+    assert row.parties == "PAWAN & ANR\nVS.\nSTATE (CBI)"
+
+
+def test_not_found_page(benchmark):
+    assert benchmark(parse_results_page, NOT_FOUND_PAGE) is None
+
+
+def test_orders_page(benchmark):
+    links = benchmark(parse_order_pdf_links, ORDERS_PAGE, ORDERS_URL)
+    assert len(links) == 120
+    assert links[-1].endswith(".pdf/2019")
+
+
+def test_orders_history(benchmark):
+    orders = benchmark(parse_orders_page, ORDERS_PAGE, ORDERS_URL)
+    assert len(orders) == 120
+    assert orders[0].order_date == date(2022, 3, 11)
+    assert orders[0].label == "ORDER (CORRIGENDUM)"
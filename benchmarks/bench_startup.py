@@ -0,0 +1,48 @@
+"""
+Cold start of app.py (fresh interpreter each round, up to a 200 from /readyz):
+
+    python -m pytest benchmarks/bench_startup.py --benchmark-autosave
+    python -m pytest benchmarks/bench_startup.py --benchmark-compare --benchmark-compare-fail=mean:10%
+
+Also fails when starting the app imports a scraper dependency; those are
+only loaded on the first scrape (or by PREWARM=1).
+"""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+# Must stay out of a process that hasn't scraped anything yet
+SCRAPER_MODULES = ("playwright", "requests", "bs4", "httpx", "project.backup_scraper", "project.lookup")
+
+PROBE = f"""
+import json, sys
+import app
+response = app.app.test_client().get('/readyz')
+print(json.dumps({{"status": response.status_code, "loaded": [m for m in {SCRAPER_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def start_app(db_path):
+    env = dict(os.environ, HISTORY_DB=str(db_path), CATALOG_FILE=str(db_path.parent / "catalog.json"),
+               WATCH_ENABLED="0", PREWARM="0")
+    out = subprocess.run([sys.executable, "-c", PROBE], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def test_cold_start(benchmark, tmp_path):
+    db_path = tmp_path / "history.db"
+    start_app(db_path)  # schema already in place, like a restarted worker
+    result = benchmark.pedantic(start_app, args=(db_path,), rounds=5, iterations=1)
+    assert result["status"] == 200
+    assert result["loaded"] == []
+
+
+def test_cold_start_new_database(benchmark, tmp_path):
+    # Includes running every migration on an empty file
+    paths = iter(tmp_path / f"history-{i}.db" for i in range(100))
+    result = benchmark.pedantic(lambda: start_app(next(paths)), rounds=5, iterations=1)
+    assert result["status"] == 200
+    assert result["loaded"] == []
@@ -0,0 +1,149 @@
+"""
+Local stand-in for the Delhi High Court case status site, for load and
+latency tests. Reproduces the form (with the #captcha-code span and a CSRF
+token), the results table, the Orders page and the order PDFs.
+
+    python benchmarks/court_sim.py --port 5055 --latency 0.3 --error-rate 0.02
+    COURT_BASE_URL=http://127.0.0.1:5055 python app.py
+
+Case numbers starting with "0" are "not found".
+"""
+import argparse
+import random
+import secrets
+import threading
+import time
+from flask import Flask, abort, request, session, url_for, Response
+
+app = Flask(__name__)
+app.secret_key = secrets.token_hex(16)
+
+SETTINGS = {
+    "latency": 0.0,      # mean seconds added to every response
+    "jitter": 0.0,       # +/- seconds of uniform noise
+    "error_rate": 0.0,   # share of responses answered with a 503
+    "result_rows": 1,    # rows in the results table
+    "orders": 10,        # orders per case
+    "pdf_kb": 64,        # size of each order PDF
+}
+CASE_TYPES = ["CRL.A.", "W.P.(C)", "CRL.M.C.", "CRL.REV.P.", "FAO", "RFA", "CS(OS)"]
+YEARS = [str(year) for year in range(1990, 2027)]
+
+_counts = {"requests": 0, "errors": 0}
+_counts_lock = threading.Lock()
+
+
+@app.before_request
+def simulate_conditions():
+    with _counts_lock:
+        _counts["requests"] += 1
+    delay = SETTINGS["latency"] + random.uniform(-SETTINGS["jitter"], SETTINGS["jitter"])
+    if delay > 0:
+        time.sleep(delay)
+    if request.endpoint != "sim_stats" and random.random() < SETTINGS["error_rate"]:
+        with _counts_lock:
+            _counts["errors"] += 1
+        abort(503)
+
+
+def _page(title, body):
+    return f"""<!DOCTYPE html>
+<html lang="en"><head><meta charset="UTF-8"><title>{title}</title></head>
+<body><div class="container">{body}</div></body></html>"""
+
+
+def _form(case_type="", case_number="", case_year=""):
+    captcha = str(random.randint(1000, 9999))
+    session["captcha"] = captcha
+    session["token"] = session.get("token") or secrets.token_hex(20)
+    types = "".join(f'<option value="{t}"{" selected" if t == case_type else ""}>{t}</option>' for t in CASE_TYPES)
+    years = "".join(f'<option value="{y}"{" selected" if y == case_year else ""}>{y}</option>' for y in YEARS)
+    return f"""
+<form id="case-status-form" method="post" action="{url_for('case_status')}">
+  <input type="hidden" name="_token" value="{session['token']}">
+  <select name="case_type"><option value="">Select</option>{types}</select>
+  <input type="text" name="case_number" value="{case_number}">
+  <select name="case_year"><option value="">Select</option>{years}</select>
+  <span id="captcha-code">{captcha}</span>
+  <input type="text" id="captchaInput" name="captchaInput">
+  <button type="submit" id="search">Submit</button>
+</form>"""
+
+
+def _results(case_type, case_number, case_year):
+    head = """<table id="caseTable"><thead><tr><th>S.No.</th><th>Diary No. / Case No.[STATUS]</th>
+<th>Petitioner Vs. Respondent</th><th>Listing Date / Court No.</th></tr></thead><tbody>"""
+    if case_number.startswith("0"):
+        return head + '<tr class="odd"><td colspan="4" class="dataTables_empty">No data available in table</td></tr></tbody></table>'
+    rows = []
+    seed = random.Random(f"{case_type}/{case_number}/{case_year}")
+    for i in range(SETTINGS["result_rows"]):
+        status = seed.choice(["DISPOSED", "PENDING"])
+        next_date = "NA" if status == "DISPOSED" else f"{seed.randint(1, 28):02d}/{seed.randint(1, 12):02d}/2027"
+        orders = url_for("orders", case_type=case_type, case_number=case_number, case_year=case_year, _external=True)
+        rows.append(f"""<tr><td>{i + 1}</td>
+<td>{case_type} - {case_number} / {case_year}<br><font color="red">[{status}]</font><br><a href="{orders}">Orders</a></td>
+<td>PETITIONER {case_number}<br>VS.<br>STATE</td>
+<td>NEXT DATE: {next_date}<br>Last Date: {seed.randint(1, 28):02d}/{seed.randint(1, 12):02d}/2024<br>COURT NO: {seed.randint(1, 40)}</td></tr>""")
+    return head + "".join(rows) + "</tbody></table>"
+
+
+@app.route("/app/get-case-type-status", methods=["GET", "POST"])
+def case_status():
+    if request.method == "GET":
+        return _page("Case Status", _form())
+
+    form = request.form
+    if form.get("_token") != session.get("token") or form.get("captchaInput") != session.get("captcha"):
+        return _page("Case Status", '<div class="alert">Invalid captcha.</div>' + _form()), 200
+    case_type, case_number, case_year = form.get("case_type", ""), form.get("case_number", ""), form.get("case_year", "")
+    return _page("Case Status", _form(case_type, case_number, case_year) + _results(case_type, case_number, case_year))
+
+
+@app.route("/app/case-type-status-details/<path:case_type>/<case_number>/<case_year>")
+def orders(case_type, case_number, case_year):
+    seed = random.Random(f"orders/{case_type}/{case_number}/{case_year}")
+    rows = []
+    for i in range(SETTINGS["orders"]):
+        order_date = f"{seed.randint(1, 28):02d}/{seed.randint(1, 12):02d}/{2019 + i * 5 // max(SETTINGS['orders'], 1)}"
+        pdf = url_for("order_pdf", order_id=f"{case_number}{i:03d}", case_year=case_year, _external=True)
+        rows.append(f'<tr><td>{i + 1}</td><td>{case_type} - {case_number} / {case_year}</td>'
+                    f'<td><a href="{pdf}" target="_blank">{order_date}</a></td><td>ORDER</td></tr>')
+    return _page("Orders", f"""<h4>{case_type} - {case_number} / {case_year}</h4>
+<table id="orderTable"><thead><tr><th>S.No.</th><th>Case No.</th><th>Date of Order</th><th>Order Type</th></tr></thead>
+<tbody>{''.join(rows)}</tbody></table>""")
+
+
+@app.route("/app/showlogo/<order_id>.pdf/<case_year>")
+def order_pdf(order_id, case_year):
+    size = SETTINGS["pdf_kb"] * 1024
+    header = f"%PDF-1.4\n% order {order_id} / {case_year}\n".encode()
+    body = header + b"0" * max(0, size - len(header) - 6) + b"\n%%EOF"
+    return Response(body, mimetype="application/pdf")
+
+
+@app.route("/_sim/stats")
+def sim_stats():
+    with _counts_lock:
+        return dict(_counts, **SETTINGS)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--latency", type=float, default=0.0, help="mean seconds added to each response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- seconds of random noise")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of 503 responses (0-1)")
+    parser.add_argument("--result-rows", type=int, default=1, help="rows in the results table")
+    parser.add_argument("--orders", type=int, default=10, help="orders per case")
+    parser.add_argument("--pdf-kb", type=int, default=64, help="size of each order PDF")
+    args = parser.parse_args(argv)
+
+    SETTINGS.update(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                    result_rows=args.result_rows, orders=args.orders, pdf_kb=args.pdf_kb)
+    app.run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
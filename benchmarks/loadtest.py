@@ -0,0 +1,255 @@
+"""
+Load test against the local court-site simulator (no traffic to the real site).
+
+Starts benchmarks/court_sim.py, and for the app targets also app.py with a
+throw-away history database, then drives lookups at a fixed concurrency and
+reports throughput, latency percentiles and peak RSS.
+
+    python benchmarks/loadtest.py --target scrape --concurrency 8 --requests 200
+    python benchmarks/loadtest.py --target http-engine --latency 0.2 --error-rate 0.02
+    python benchmarks/loadtest.py --target playwright-engine --concurrency 4 --requests 40
+
+Targets:
+  scrape             POST /scrape on app.py
+  pdf                POST /get_pdf_url on app.py
+  http-engine        lookup_case_http() in this process
+  playwright-engine  lookup_case() in this process (needs Playwright browsers)
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+
+ROOT = Path(__file__).resolve().parent.parent
+APP_TARGETS = {"scrape": "/scrape", "pdf": "/get_pdf_url"}
+ENGINE_TARGETS = ("http-engine", "playwright-engine")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.1)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def tree_rss(pid):
+    """RSS in bytes of a process and all its descendants (Linux /proc, or psutil)."""
+    try:
+        import psutil
+        proc = psutil.Process(pid)
+        procs = [proc] + proc.children(recursive=True)
+        total = 0
+        for p in procs:
+            try:
+                total += p.memory_info().rss
+            except psutil.Error:
+                pass
+        return total
+    except ImportError:
+        pass
+
+    children = {}
+    for entry in Path("/proc").iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / "stat").read_text()
+            ppid = int(stat.rsplit(")", 1)[1].split()[1])
+            children.setdefault(ppid, []).append(int(entry.name))
+        except (OSError, ValueError, IndexError):
+            continue
+    total, stack = 0, [pid]
+    page = os.sysconf("SC_PAGE_SIZE")
+    while stack:
+        current = stack.pop()
+        try:
+            total += int((Path("/proc") / str(current) / "statm").read_text().split()[1]) * page
+        except (OSError, ValueError, IndexError):
+            pass
+        stack.extend(children.get(current, []))
+    return total
+
+
+class RssSampler(threading.Thread):
+    def __init__(self, pid, interval=0.2):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.peak = 0
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.is_set():
+            self.peak = max(self.peak, tree_rss(self.pid))
+            self._done.wait(self.interval)
+
+    def stop(self):
+        self._done.set()
+        self.join()
+        self.peak = max(self.peak, tree_rss(self.pid))
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    low, high = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (k - low)
+
+
+def case_for(i, distinct):
+    # Distinct case numbers defeat the cache; --distinct N repeats them
+    number = 100000 + (i % distinct if distinct else i)
+    return "CRL.A.", str(number), "2019"
+
+
+def make_call(target, app_url):
+    if target in APP_TARGETS:
+        session = requests.Session()
+        url = app_url + APP_TARGETS[target]
+
+        def call(case):
+            response = session.post(url, data=dict(zip(("case_type", "case_number", "case_year"), case)), timeout=300)
+            return response.status_code == 200 and response.json().get("success", False)
+        return call
+
+    if target == "http-engine":
+        from project.backup_scraper import lookup_case_http
+        return lambda case: lookup_case_http(*case) is not None
+
+    from project.lookup import lookup_case
+    return lambda case: lookup_case(*case, raise_errors=True) is not None
+
+
+def run(args):
+    procs = []
+    sim_port = free_port()
+    sim_url = f"http://127.0.0.1:{sim_port}"
+    env = dict(os.environ, COURT_BASE_URL=sim_url, PYTHONUNBUFFERED="1")
+    quiet = subprocess.DEVNULL if not args.verbose else None
+
+    procs.append(subprocess.Popen(
+        [sys.executable, str(ROOT / "benchmarks" / "court_sim.py"), "--port", str(sim_port),
+         "--latency", str(args.latency), "--jitter", str(args.jitter), "--error-rate", str(args.error_rate),
+         "--result-rows", str(args.result_rows), "--orders", str(args.orders)],
+        stdout=quiet, stderr=quiet))
+    tmpdir = tempfile.TemporaryDirectory()
+    try:
+        wait_for(sim_url + "/_sim/stats")
+        app_url = None
+        if args.target in APP_TARGETS:
+            app_port = free_port()
+            app_url = f"http://127.0.0.1:{app_port}"
+            # Everything the app writes stays in the temp dir (a catalog read from the simulator
+            # must not end up in the repo's catalog.json)
+            app_env = dict(env, HISTORY_DB=os.path.join(tmpdir.name, "history.db"),
+                           CATALOG_FILE=os.path.join(tmpdir.name, "catalog.json"),
+                           PDF_STORE_DIR=os.path.join(tmpdir.name, "pdf_store"))
+            app_proc = subprocess.Popen(
+                [sys.executable, "-c", f"import app; app.app.run(port={app_port}, threaded=True)"],
+                cwd=ROOT, env=app_env, stdout=quiet, stderr=quiet)
+            procs.append(app_proc)
+            wait_for(app_url + "/")
+            measured_pid = app_proc.pid
+        else:
+            os.environ["COURT_BASE_URL"] = sim_url
+            os.environ["CATALOG_FILE"] = os.path.join(tmpdir.name, "catalog.json")
+            sys.path.insert(0, str(ROOT))
+            measured_pid = os.getpid()
+
+        call = make_call(args.target, app_url)
+        latencies, failures = [], 0
+        lock = threading.Lock()
+
+        def one(i):
+            nonlocal failures
+            started = time.perf_counter()
+            try:
+                ok = call(case_for(i, args.distinct))
+            except Exception:
+                ok = False
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                if not ok:
+                    failures += 1
+
+        sampler = RssSampler(measured_pid)
+        sampler.start()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            list(pool.map(one, range(args.requests)))
+        wall = time.perf_counter() - started
+        sampler.stop()
+
+        return {
+            "target": args.target,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "failures": failures,
+            "wall_seconds": round(wall, 3),
+            "throughput_rps": round(args.requests / wall, 2),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+            "peak_rss_mb": round(sampler.peak / 1024 / 1024, 1),
+            "site": requests.get(sim_url + "/_sim/stats", timeout=5).json(),
+        }
+    finally:
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        tmpdir.cleanup()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=list(APP_TARGETS) + list(ENGINE_TARGETS), default="scrape")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--distinct", type=int, default=0, help="cycle through N case numbers (0 = all distinct)")
+    parser.add_argument("--latency", type=float, default=0.1, help="simulated site latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.05, help="simulated latency noise (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="simulated 503 rate (0-1)")
+    parser.add_argument("--result-rows", type=int, default=1)
+    parser.add_argument("--orders", type=int, default=10)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--verbose", action="store_true", help="show simulator / app output")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    for key, value in report.items():
+        if key != "site":
+            print(f"{key:>16}: {value}")
+    print(f"{'site requests':>16}: {report['site']['requests']} ({report['site']['errors']} simulated errors)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,395 @@
+import os
+import time
+import asyncio
+import httpx
+from urllib.parse import urljoin
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+from project.config import CASE_STATUS_URL, TIMEOUTS
+from project.http_sessions import HTTP_SESSION_POOL, TOKEN_REFUSED, WarmSession
+from project.info_scraper import _is_search_response
+from project.parser import LayoutChanged, orders_from_links, parse_orders_page, parse_results_page, parse_row_html
+from project.ratelimit import Overloaded, limiter_for, polite_call_async
+from project.scarp import ORDERS_JS
+from project.timing import StepTimer, step
+
+# Lookups in flight at once on one event loop (the court rate limiter still applies)
+ASYNC_MAX_LOOKUPS = int(os.environ.get("ASYNC_MAX_LOOKUPS", "16"))
+# Browser contexts open at once in the single browser
+ASYNC_MAX_PAGES = int(os.environ.get("ASYNC_MAX_PAGES", "8"))
+
+
+def _is_timeout(e):
+    return isinstance(e, (httpx.TimeoutException, httpx.NetworkError))
+
+
+class AsyncScraper:
+    """
+    The scrapers on one asyncio event loop: HTTP lookups share a few warm
+    httpx clients (captcha / CSRF token reused like the sync HTTP engine),
+    browser lookups share ONE Chromium with a fresh context per lookup
+    instead of a browser per worker thread. Use it on a single loop:
+
+        async with AsyncScraper() as scraper:
+            results = await scraper.lookup_many(cases)
+    """
+
+    def __init__(self, headless=True, max_lookups=ASYNC_MAX_LOOKUPS, max_pages=ASYNC_MAX_PAGES):
+        self.headless = headless
+        self._lookups = asyncio.Semaphore(max(1, max_lookups))
+        self._pages = asyncio.Semaphore(max(1, max_pages))
+        self._idle = []           # warm sessions, most recently used last
+        self._browser = None
+        self._playwright = None
+        self._browser_lock = asyncio.Lock()
+        self.stats = {"lookups": 0, "form_loads": 0, "form_reuses": 0, "rejected": 0, "contexts": 0, "launches": 0}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        idle, self._idle = self._idle, []
+        for warm in idle:
+            await warm.session.aclose()
+        if self._browser is not None:
+            await self._browser.close()
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    # ---- Same answers as the sync scrapers ----
+
+    async def case_info(self, case_type, case_number, case_year):
+        """scrape_case_info: case info through the browser, None if not found or on errors."""
+        timer = StepTimer("case_info", engine="async_playwright")
+        try:
+            result = await self._on_page(lambda page: self._case_row(page, case_type, case_number, case_year, timer), timer)
+            timer.finish("found" if result else "not_found")
+            return result
+        except Exception as e:
+            print("Error scraping case info:", e)
+            timer.finish("error")
+            return None
+
+    async def case_info_http(self, case_type, case_number, case_year):
+        """scrape_case_info_backup: case info over plain HTTP, None if not found or on errors."""
+        try:
+            result = await self.lookup_http(case_type, case_number, case_year, with_pdf=False)
+        except Exception as e:
+            print(f"Backup scraper error: {e}")
+            return None
+        if result:
+            result.pop('pdf_link', None)
+        return result
+
+    async def pdf_url(self, case_type, case_number, case_year):
+        """get_pdf_url: latest order PDF through the browser, None if there is none or on errors."""
+        timer = StepTimer("pdf_url", engine="async_playwright")
+        try:
+            async def latest_pdf(page):
+                await self._open_case_status(page, case_type, case_number, case_year, timer)
+                with step(timer, "results_table"):
+                    await page.wait_for_selector('table tbody tr', state='attached', timeout=TIMEOUTS.results_table)
+                orders = await self._collect_orders(page, timer)
+                return orders[-1].pdf_url if orders else None
+
+            pdf_url = await self._on_page(latest_pdf, timer)
+            timer.finish("found" if pdf_url else "not_found")
+            return pdf_url
+        except Exception:
+            timer.finish("error")
+            return None
+
+    async def lookup_http(self, case_type, case_number, case_year, with_pdf=True):
+        """
+        lookup_case_http: case info plus `pdf_link` / `orders` when `with_pdf`.
+        None when the case does not exist; raises LayoutChanged when the
+        pages can't be read without a browser.
+        """
+        timer = StepTimer("lookup" if with_pdf else "case_info", engine="async_http")
+        try:
+            result = await self._lookup_http(case_type, case_number, case_year, with_pdf, timer)
+        except LayoutChanged:
+            timer.finish("layout_changed")
+            raise
+        except Exception:
+            timer.finish("error")
+            raise
+        timer.finish("found" if result else "not_found")
+        return result
+
+    async def lookup(self, case_type, case_number, case_year):
+        """
+        Like EngineRouter.lookup with the default engine order: HTTP first,
+        the browser only when the page can't be read without one.
+        Returns (case_info, engine_name).
+        """
+        async with self._lookups:
+            self.stats["lookups"] += 1
+            try:
+                return await self.lookup_http(case_type, case_number, case_year), "async_http"
+            except LayoutChanged as e:
+                print(f"async_http engine can't read the page ({e}), falling back...")
+            return await self._lookup_browser(case_type, case_number, case_year), "async_playwright"
+
+    async def lookup_many(self, cases):
+        """
+        lookup() for many (case_type, case_number, case_year) tuples at once.
+        Results come back in input order as (case_info, engine) or the
+        exception that lookup raised.
+        """
+        return await asyncio.gather(*(self.lookup(*case) for case in cases), return_exceptions=True)
+
+    # ---- HTTP ----
+
+    async def _lookup_http(self, case_type, case_number, case_year, with_pdf, timer):
+        warm = self._acquire()
+        try:
+            url = CASE_STATUS_URL
+            response = await self._submit(warm, url, case_type, case_number, case_year, timer)
+            with step(timer, "parse"):
+                row = parse_results_page(response.text)
+            if row is None:
+                print("No case data found")
+                result = None
+            else:
+                result = row.to_dict()
+                if with_pdf:
+                    # The orders are a bonus: a missing Orders page should not lose the case info
+                    try:
+                        orders = await self._orders(warm.session, urljoin(url, row.orders_link), timer) if row.orders_link else []
+                    except Exception as e:
+                        print(f"Orders lookup error: {e}")
+                        orders = []
+                    result['pdf_link'] = orders[-1].pdf_url if orders else None
+                    result['orders'] = [order.to_dict() for order in orders]
+        except Exception:
+            await warm.session.aclose()
+            raise
+        self._release(warm)
+        return result
+
+    async def _submit(self, warm, url, case_type, case_number, case_year, timer):
+        # backup_scraper._submit with awaits: reuse the form state, one retry with a fresh form
+        for attempt in (1, 2):
+            if warm.ready():
+                self.stats["form_reuses"] += 1
+            else:
+                with step(timer, "navigate"):
+                    response = await court_request_async(warm.session, 'GET', url)
+                with step(timer, "captcha"):
+                    warm.require_form(response.text)
+                self.stats["form_loads"] += 1
+
+            with step(timer, "submit"):
+                try:
+                    response = await court_request_async(warm.session, 'POST', url, data=warm.form_data(case_type, case_number, case_year))
+                except httpx.HTTPStatusError as e:
+                    if e.response.status_code not in TOKEN_REFUSED:
+                        raise
+                    response = None
+
+            if warm.take_answer(response.text if response is not None else None):
+                return response
+            self.stats["rejected"] += 1
+        raise LayoutChanged("The site rejected the search form twice")
+
+    async def _orders(self, client, orders_url, timer=None):
+        with step(timer, "orders_navigate"):
+            response = await court_request_async(client, 'GET', orders_url)
+        with step(timer, "orders_parse"):
+            return parse_orders_page(response.text, orders_url)
+
+    def _acquire(self):
+        if self._idle:
+            return self._idle.pop()
+        client = httpx.AsyncClient(timeout=30, follow_redirects=True,
+                                   limits=httpx.Limits(max_connections=2, max_keepalive_connections=2))
+        return WarmSession(client)
+
+    def _release(self, warm):
+        if len(self._idle) < max(HTTP_SESSION_POOL, 1):
+            self._idle.append(warm)
+        else:
+            # Extra sessions from a burst; close in the background
+            asyncio.ensure_future(warm.session.aclose())
+
+    # ---- Browser ----
+
+    async def _get_browser(self):
+        async with self._browser_lock:
+            if self._browser is None or not self._browser.is_connected():
+                if self._playwright is None:
+                    self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch(headless=self.headless)
+                self.stats["launches"] += 1
+            return self._browser
+
+    async def _on_page(self, fn, timer=None):
+        """`await fn(page)` in a fresh context of the shared browser."""
+        queued_at = time.monotonic()
+        async with self._pages:
+            browser = await self._get_browser()
+            context = await browser.new_context()
+            self.stats["contexts"] += 1
+            try:
+                page = await context.new_page()
+                if timer is not None:
+                    timer.add("browser_acquire", time.monotonic() - queued_at)
+                return await fn(page)
+            finally:
+                await context.close()
+
+    async def _lookup_browser(self, case_type, case_number, case_year):
+        timer = StepTimer("lookup", engine="async_playwright")
+
+        async def lookup(page):
+            case_info = await self._case_row(page, case_type, case_number, case_year, timer)
+            if not case_info:
+                return None
+            try:
+                orders = await self._collect_orders(page, timer)
+            except Exception as e:
+                print(f"Orders lookup error: {e}")
+                orders = []
+            case_info['pdf_link'] = orders[-1].pdf_url if orders else None
+            case_info['orders'] = [order.to_dict() for order in orders]
+            return case_info
+
+        try:
+            case_info = await self._on_page(lookup, timer)
+        except Exception:
+            timer.finish("error")
+            raise
+        timer.finish("found" if case_info else "not_found")
+        return case_info
+
+    async def _goto(self, page, url, timeout):
+        async def load():
+            response = await page.goto(url, wait_until="domcontentloaded", timeout=timeout)
+            if response is not None and (response.status >= 500 or response.status == 429):
+                raise Overloaded(f"{response.status} from {url}")
+            return response
+
+        return await polite_call_async(url, load, is_timeout=lambda e: isinstance(e, PlaywrightTimeoutError))
+
+    async def _open_case_status(self, page, case_type, case_number, case_year, timer=None):
+        # Same steps as info_scraper.open_case_status
+        with step(timer, "navigate"):
+            await self._goto(page, CASE_STATUS_URL, TIMEOUTS.navigation)
+            await page.wait_for_selector('#captcha-code', state='visible', timeout=TIMEOUTS.form_ready)
+
+        with step(timer, "fill_form"):
+            await page.select_option('select[name="case_type"]', case_type)
+            await page.fill('input[name="case_number"]', case_number)
+            await page.select_option('select[name="case_year"]', case_year)
+
+        with step(timer, "captcha"):
+            captcha_value = (await page.inner_text('#captcha-code')).strip()
+            await page.fill('#captchaInput', captcha_value)
+
+        with step(timer, "submit"):
+            limiter = limiter_for(CASE_STATUS_URL)
+            await limiter.acquire_async()
+            started = time.monotonic()
+            try:
+                async with page.expect_response(_is_search_response, timeout=TIMEOUTS.search_response) as response_info:
+                    await page.locator('#search').click()
+                status = (await response_info.value).status
+                limiter.record(time.monotonic() - started, "server_error" if status >= 500 else "ok")
+            except PlaywrightTimeoutError:
+                limiter.record(outcome="timeout")
+                print("⚠️ No search response seen, waiting for the table instead.")
+
+    async def _case_row(self, page, case_type, case_number, case_year, timer=None):
+        await self._open_case_status(page, case_type, case_number, case_year, timer)
+        with step(timer, "results_table"):
+            await page.wait_for_selector('table tbody tr', state='attached', timeout=TIMEOUTS.results_table)
+        with step(timer, "parse"):
+            rows = page.locator('table tbody tr')
+            if await rows.count() == 0:
+                print("❌ No case row found.")
+                return None
+            try:
+                row = parse_row_html(await rows.first.evaluate("row => row.outerHTML"))
+            except LayoutChanged:
+                print("❌ Unexpected table structure.")
+                return None
+            return row.to_dict() if row else None
+
+    async def _collect_orders(self, page, timer=None):
+        # Same steps as scarp.collect_orders
+        orders = page.locator('a:has-text("Orders")')
+        if await orders.count() == 0:
+            return []
+        orders_link = await orders.first.get_attribute('href')
+        if not orders_link:
+            return []
+        orders_link = urljoin(page.url, orders_link)
+
+        with step(timer, "orders_navigate"):
+            await self._goto(page, orders_link, TIMEOUTS.orders_page)
+
+        with step(timer, "orders_links"):
+            try:
+                await page.wait_for_selector('a[href*=".pdf"]', state='attached', timeout=TIMEOUTS.orders_links)
+            except PlaywrightTimeoutError:
+                return []
+
+        with step(timer, "orders_parse"):
+            links = await page.eval_on_selector_all('a[href*=".pdf"]', ORDERS_JS)
+            return orders_from_links(links, page.url)
+
+
+async def court_request_async(client, method, url, **kwargs):
+    """court_request for an httpx.AsyncClient: rate limited, retried when the site is struggling."""
+    async def send():
+        response = await client.request(method, url, **kwargs)
+        if response.status_code >= 500 or response.status_code == 429:
+            raise Overloaded(f"{response.status_code} from {url}")
+        response.raise_for_status()
+        return response
+
+    return await polite_call_async(url, send, is_timeout=_is_timeout)
+
+
+# ---- Async versions of the sync scraper functions ----
+# Pass a shared `scraper` to run many of them on one browser / set of clients.
+
+async def scrape_case_info_async(case_type, case_number, case_year, scraper=None, headless=True):
+    if scraper is not None:
+        return await scraper.case_info(case_type, case_number, case_year)
+    async with AsyncScraper(headless=headless) as scraper:
+        return await scraper.case_info(case_type, case_number, case_year)
+
+
+async def scrape_case_info_backup_async(case_type, case_number, case_year, scraper=None):
+    if scraper is not None:
+        return await scraper.case_info_http(case_type, case_number, case_year)
+    async with AsyncScraper() as scraper:
+        return await scraper.case_info_http(case_type, case_number, case_year)
+
+
+async def get_pdf_url_async(case_type, case_number, case_year, scraper=None):
+    if scraper is not None:
+        return await scraper.pdf_url(case_type, case_number, case_year)
+    async with AsyncScraper() as scraper:
+        return await scraper.pdf_url(case_type, case_number, case_year)
+
+
+def lookup_many(cases, max_lookups=ASYNC_MAX_LOOKUPS, headless=True):
+    """Sync entry point: look up many cases on one event loop (see AsyncScraper.lookup_many)."""
+    async def run():
+        async with AsyncScraper(headless=headless, max_lookups=max_lookups) as scraper:
+            return await scraper.lookup_many(cases)
+
+    return asyncio.run(run())
+
+
+# ---- Test run ----
+if __name__ == "__main__":
+    for result in lookup_many([("CRL.A.", "1207", "2019"), ("W.P.(C)", "1", "2020")]):
+        print(result)
@@ -1,113 +1,128 @@
 import requests
-import re
-from bs4 import BeautifulSoup
-import time
+from urllib.parse import urljoin
+from project.config import CASE_STATUS_URL
+from project.http_sessions import TOKEN_REFUSED, get_session_pool
+from project.parser import LayoutChanged, parse_orders_page, parse_results_page
+from project.ratelimit import Overloaded, polite_call
+from project.timing import StepTimer, step
+
 
 def scrape_case_info_backup(case_type, case_number, case_year):
     """
     Backup scraper using requests instead of Playwright
     """
     try:
-        session = requests.Session()
-        
-        # First get the main page to get session cookies
-        url = "https://delhihighcourt.nic.in/app/get-case-type-status"
-        response = session.get(url, timeout=30)
-        
-        if response.status_code != 200:
-            print(f"Failed to load page: {response.status_code}")
-            return None
-            
-        # Parse the page to get captcha
-        soup = BeautifulSoup(response.text, 'html.parser')
-        captcha_element = soup.find('span', {'id': 'captcha-code'})
-        
-        if not captcha_element:
-            print("Captcha element not found")
-            return None
-            
-        captcha_value = captcha_element.get_text().strip()
-        print(f"Captcha value: {captcha_value}")
-        
-        # Prepare form data
-        form_data = {
-            'case_type': case_type,
-            'case_number': case_number,
-            'case_year': case_year,
-            'captchaInput': captcha_value
-        }
-        
-        # Submit the form
-        response = session.post(url, data=form_data, timeout=30)
-        
-        if response.status_code != 200:
-            print(f"Form submission failed: {response.status_code}")
-            return None
-            
-        # Parse the results
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Find the results table
-        table = soup.find('table')
-        if not table:
-            print("No results table found")
-            return None
-            
-        rows = table.find_all('tr')
-        if len(rows) < 2:  # Header + at least one data row
-            print("No case data found")
-            return None
-            
-        # Get the first data row (skip header)
-        data_row = rows[1]
-        cells = data_row.find_all('td')
-        
-        if len(cells) < 4:
-            print("Incomplete case data")
-            return None
-            
-        # Extract data from cells
-        case_cell = cells[1].get_text().strip()
-        parties = cells[2].get_text().strip()
-        date_block = cells[3].get_text().strip()
-        
-        # Parse case number and status
-        case_identifier = case_cell.split('\n')[0].strip()
-        status_match = re.search(r'\[([^\]]+)\]', case_cell)
-        status = status_match.group(1).strip() if status_match else None
-        
-        # Parse dates
-        next_hearing = None
-        last_hearing = None
-        court_no = None
-        
-        nd = re.search(r'NEXT DATE:\s*([^\n]+)', date_block, re.IGNORECASE)
-        if nd:
-            next_hearing = nd.group(1).strip()
-            
-        ld = re.search(r'Last Date:\s*([^\n]+)', date_block, re.IGNORECASE)
-        if ld:
-            last_hearing = ld.group(1).strip()
-            
-        cn = re.search(r'COURT NO:\s*([^\n]*)', date_block, re.IGNORECASE)
-        if cn:
-            court_no = cn.group(1).strip() or None
-            
-        result = {
-            "case_identifier": case_identifier,
-            "status": status,
-            "parties": parties,
-            "next_hearing_date": next_hearing,
-            "last_hearing_date": last_hearing,
-            "court_no": court_no,
-        }
-        
+        result = lookup_case_http(case_type, case_number, case_year, with_pdf=False)
+        if result:
+            result.pop('pdf_link', None)
         return result
-        
     except Exception as e:
         print(f"Backup scraper error: {e}")
         return None
 
+
+def lookup_case_http(case_type, case_number, case_year, with_pdf=True):
+    """
+    Case info (and, when `with_pdf` is set, the latest order PDF as
+    `pdf_link` plus every order as `orders`) using plain HTTP requests.
+    Returns None when the site says the case does not exist, raises
+    LayoutChanged when the pages can't be parsed without a browser.
+    """
+    timer = StepTimer("lookup" if with_pdf else "case_info", engine="http")
+    try:
+        result = _lookup_case_http(case_type, case_number, case_year, with_pdf, timer)
+    except LayoutChanged:
+        timer.finish("layout_changed")
+        raise
+    except Exception:
+        timer.finish("error")
+        raise
+    timer.finish("found" if result else "not_found")
+    return result
+
+
+def _lookup_case_http(case_type, case_number, case_year, with_pdf, timer):
+    # Warm session: open connections and, usually, a captcha / token from the last page
+    pool = get_session_pool()
+    warm = pool.acquire()
+    try:
+        url = CASE_STATUS_URL
+        response = _submit(pool, warm, url, case_type, case_number, case_year, timer)
+
+        # Parse the results (None when the site has no such case)
+        with step(timer, "parse"):
+            row = parse_results_page(response.text)
+        if row is None:
+            print("No case data found")
+            result = None
+        else:
+            result = row.to_dict()
+            if with_pdf:
+                # The orders are a bonus: a missing Orders page should not lose the case info
+                try:
+                    orders = _orders(warm.session, urljoin(url, row.orders_link), timer) if row.orders_link else []
+                except Exception as e:
+                    print(f"Orders lookup error: {e}")
+                    orders = []
+                result['pdf_link'] = orders[-1].pdf_url if orders else None
+                result['orders'] = [order.to_dict() for order in orders]
+    except Exception:
+        pool.release(warm, healthy=False)
+        raise
+    pool.release(warm)
+    return result
+
+
+def _submit(pool, warm, url, case_type, case_number, case_year, timer):
+    """
+    POST the search with the session's form state. The form is only fetched
+    when the session has none (or it is too old / used up); a rejected
+    captcha or CSRF token gets one retry with a fresh form.
+    """
+    for attempt in (1, 2):
+        if warm.ready():
+            pool.count("form_reuses")
+        else:
+            # Get the form page for session cookies, the CSRF token and the captcha
+            with step(timer, "navigate"):
+                response = court_request(warm.session, 'GET', url)
+            with step(timer, "captcha"):
+                warm.require_form(response.text)
+            pool.count("form_loads")
+            print(f"Captcha value: {warm.fields['captchaInput']}")
+
+        with step(timer, "submit"):
+            try:
+                response = court_request(warm.session, 'POST', url, data=warm.form_data(case_type, case_number, case_year))
+            except requests.HTTPError as e:
+                if e.response is None or e.response.status_code not in TOKEN_REFUSED:
+                    raise
+                response = None
+
+        if warm.take_answer(response.text if response is not None else None):
+            return response
+        pool.count("rejected")
+    raise LayoutChanged("The site rejected the search form twice")
+
+
+def court_request(session, method, url, **kwargs):
+    """One request to the court site, rate limited and retried when the site is struggling."""
+    def send():
+        response = session.request(method, url, timeout=30, **kwargs)
+        if response.status_code >= 500 or response.status_code == 429:
+            raise Overloaded(f"{response.status_code} from {url}")
+        response.raise_for_status()
+        return response
+
+    return polite_call(url, send, is_timeout=lambda e: isinstance(e, (requests.Timeout, requests.ConnectionError)))
+
+
+def _orders(session, orders_url, timer=None):
+    with step(timer, "orders_navigate"):
+        response = court_request(session, 'GET', orders_url)
+    with step(timer, "orders_parse"):
+        return parse_orders_page(response.text, orders_url)
+
 if __name__ == "__main__":
     # Test the backup scraper
     result = scrape_case_info_backup("CRL.A.", "1207", "2019")
@@ -0,0 +1,263 @@
+import os
+import json
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from project.db import get_connection
+
+# Lookups running at the same time across all batch jobs
+BATCH_MAX_PARALLEL = int(os.environ.get("BATCH_MAX_PARALLEL", "4"))
+# Largest docket accepted in one request
+BATCH_MAX_CASES = int(os.environ.get("BATCH_MAX_CASES", "500"))
+# Finished jobs are forgotten after this many seconds
+BATCH_KEEP_SECONDS = int(os.environ.get("BATCH_KEEP_SECONDS", "3600"))
+# Unfinished jobs are forgotten this long after they were created (their worker is long gone)
+BATCH_MAX_RUN_SECONDS = int(os.environ.get("BATCH_MAX_RUN_SECONDS", "86400"))
+# A stream ends after this many seconds without a new result
+BATCH_STREAM_IDLE_SECONDS = float(os.environ.get("BATCH_STREAM_IDLE_SECONDS", "300"))
+# How often a stream served by another worker than the job's looks for new results
+BATCH_POLL_SECONDS = float(os.environ.get("BATCH_POLL_SECONDS", "0.5"))
+
+CASE_FIELDS = ("case_type", "case_number", "case_year")
+
+
+def parse_cases(items):
+    """
+    Accepts a list of {"case_type", "case_number", "case_year"} objects or
+    [case_type, case_number, case_year] lists. Returns a list of case dicts
+    (None for entries that are incomplete).
+    """
+    cases = []
+    for item in items:
+        if isinstance(item, dict):
+            case = {field: str(item.get(field) or "").strip() for field in CASE_FIELDS}
+        elif isinstance(item, (list, tuple)) and len(item) == 3:
+            case = {field: str(value or "").strip() for field, value in zip(CASE_FIELDS, item)}
+        else:
+            case = None
+        if case is not None and not all(case.values()):
+            case = None
+        cases.append(case)
+    return cases
+
+
+class BatchJob:
+    """
+    One docket of cases; results are kept in completion order. The process
+    running the job also writes it to the batch tables, and a poll or
+    stream that lands on another worker reads it from there (`load`).
+
+    With `leases`, the running process holds the job's "batch:<id>" claim.
+    A reader that finds the claim lapsed before the job finished (the
+    worker crashed or restarted) fails the cases that are left, so the job
+    still ends.
+    """
+
+    def __init__(self, cases, db_path=None, job_id=None, created_at=None, leases=None):
+        self.id = job_id or uuid.uuid4().hex
+        self.cases = cases
+        self.db_path = db_path
+        self.leases = leases
+        self.results = []
+        self.created_at = created_at or time.time()
+        self.finished_at = None
+        self.remote = False       # run by another process, read from the database
+        self._cond = threading.Condition()
+
+    @classmethod
+    def load(cls, db_path, job_id, leases=None):
+        """A job stored by any process, with the results it has so far; None if unknown."""
+        conn = get_connection(db_path)
+        row = conn.execute("SELECT cases, created_at, finished_at FROM batch_jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = cls(json.loads(row[0]), db_path, job_id, row[1], leases)
+        job.remote = True
+        job.finished_at = row[2]
+        job._read_results(conn)
+        job._check_owner(conn)
+        return job
+
+    @property
+    def lease_name(self):
+        return f"batch:{self.id}"
+
+    @property
+    def done(self):
+        return len(self.results) >= len(self.cases)
+
+    def save(self):
+        if self.db_path is None:
+            return
+        conn = get_connection(self.db_path)
+        conn.execute("INSERT INTO batch_jobs (id, cases, created_at) VALUES (?, ?, ?)",
+                     (self.id, json.dumps(self.cases), self.created_at))
+        conn.commit()
+
+    def add_result(self, index, payload):
+        case = self.cases[index]
+        line = {"index": index}
+        line.update(case or {})
+        line["result"] = payload
+        with self._cond:
+            self.results.append(line)
+            if self.done:
+                self.finished_at = time.time()
+            if self.db_path is not None:
+                # Under the lock so seq follows completion order
+                conn = get_connection(self.db_path)
+                conn.execute("INSERT INTO batch_results (job_id, seq, line) VALUES (?, ?, ?)",
+                             (self.id, len(self.results) - 1, json.dumps(line)))
+                if self.finished_at:
+                    conn.execute("UPDATE batch_jobs SET finished_at = ? WHERE id = ?", (self.finished_at, self.id))
+                conn.commit()
+            self._cond.notify_all()
+
+    def iter_results(self, timeout=None):
+        """Yield results as they arrive until the job is done."""
+        if self.remote:
+            yield from self._poll_results(timeout)
+            return
+        sent = 0
+        while True:
+            with self._cond:
+                while sent >= len(self.results) and not self.done:
+                    if not self._cond.wait(timeout):
+                        return
+                pending = self.results[sent:]
+                finished = self.done
+            for line in pending:
+                yield line
+            sent += len(pending)
+            if finished and sent >= len(self.results):
+                return
+
+    def _poll_results(self, timeout=None):
+        # Another process runs the job: look for new rows every BATCH_POLL_SECONDS
+        conn = get_connection(self.db_path)
+        sent = 0
+        last_new = time.monotonic()
+        while True:
+            for line in self.results[sent:]:
+                yield line
+            if len(self.results) > sent:
+                sent = len(self.results)
+                last_new = time.monotonic()
+            if self.done:
+                return
+            if timeout is not None and time.monotonic() - last_new >= timeout:
+                return
+            time.sleep(BATCH_POLL_SECONDS)
+            self._read_results(conn)
+            self._check_owner(conn)
+
+    def _read_results(self, conn):
+        rows = conn.execute("SELECT line FROM batch_results WHERE job_id = ? AND seq >= ? ORDER BY seq",
+                            (self.id, len(self.results))).fetchall()
+        self.results.extend(json.loads(row[0]) for row in rows)
+        if self.done and self.finished_at is None:
+            self.finished_at = conn.execute("SELECT finished_at FROM batch_jobs WHERE id = ?", (self.id,)).fetchone()[0]
+
+    def _check_owner(self, conn):
+        """Fail the cases that are left when the job's worker is gone (its claim lapsed)."""
+        if self.done or self.leases is None or self.leases.held(self.lease_name):
+            return
+        # Taking the claim makes sure only one reader finishes the job
+        if not self.leases.claim(self.lease_name):
+            return
+        try:
+            self._read_results(conn)
+            if self.done:
+                return  # finished just before its claim was released
+            print(f"Batch job {self.id} lost its worker, failing the cases left")
+            seen = {line["index"] for line in self.results}
+            for index, case in enumerate(self.cases):
+                if index not in seen:
+                    self.add_result(index, {"success": False, "error": "The worker running this batch stopped. Please try again."})
+        finally:
+            self.leases.release(self.lease_name)
+
+    def to_dict(self, include_results=True):
+        with self._cond:
+            results = list(self.results)
+        data = {
+            "job_id": self.id,
+            "status": "done" if self.done else "running",
+            "total": len(self.cases),
+            "completed": len(results),
+            "from_cache": sum(1 for r in results if r["result"].get("from_cache")),
+            "failed": sum(1 for r in results if not r["result"].get("success")),
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+        if include_results:
+            data["results"] = results
+        return data
+
+
+class BatchRunner:
+    """
+    Runs batch jobs on a shared, bounded thread pool so a large docket can't
+    start more than `max_parallel` lookups at once. With `db_path`, jobs and
+    results are also stored in the database, so every worker can report on
+    them (the job still runs in the process that accepted it, which holds
+    its claim in `leases` until it is done).
+    """
+
+    def __init__(self, lookup_fn, max_parallel=BATCH_MAX_PARALLEL, db_path=None, leases=None):
+        self.lookup_fn = lookup_fn
+        self.db_path = db_path
+        self.leases = leases
+        self.max_parallel = max(1, max_parallel)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_parallel, thread_name_prefix="batch")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, cases):
+        job = BatchJob(cases, self.db_path, leases=self.leases)
+        with self._lock:
+            self._forget_old_jobs()
+            self._jobs[job.id] = job
+        if self.leases is not None:
+            # Claimed before the row exists, so no reader takes the job for abandoned
+            self.leases.claim(job.lease_name)
+        job.save()
+        for index, case in enumerate(cases):
+            if case is None:
+                self._add_result(job, index, {"success": False, "error": "Please provide case_type, case_number and case_year."})
+            else:
+                self._executor.submit(self._run_one, job, index, case)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None and self.db_path is not None:
+            job = BatchJob.load(self.db_path, job_id, self.leases)
+        return job
+
+    def _run_one(self, job, index, case):
+        try:
+            payload = self.lookup_fn(case["case_type"], case["case_number"], case["case_year"])
+        except Exception as e:
+            payload = {"success": False, "error": f"An error occurred: {str(e)}"}
+        self._add_result(job, index, payload)
+
+    def _add_result(self, job, index, payload):
+        job.add_result(index, payload)
+        if job.done and self.leases is not None:
+            self.leases.release(job.lease_name)
+
+    def _forget_old_jobs(self):
+        now = time.time()
+        cutoff, run_cutoff = now - BATCH_KEEP_SECONDS, now - BATCH_MAX_RUN_SECONDS
+        for job_id in [j.id for j in self._jobs.values()
+                       if (j.finished_at and j.finished_at < cutoff) or (not j.finished_at and j.created_at < run_cutoff)]:
+            del self._jobs[job_id]
+        if self.db_path is not None:
+            old = "SELECT id FROM batch_jobs WHERE finished_at < ? OR (finished_at IS NULL AND created_at < ?)"
+            conn = get_connection(self.db_path)
+            conn.execute(f"DELETE FROM batch_results WHERE job_id IN ({old})", (cutoff, run_cutoff))
+            conn.execute(f"DELETE FROM batch_jobs WHERE id IN ({old})", (cutoff, run_cutoff))
+            conn.commit()
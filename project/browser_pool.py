@@ -0,0 +1,202 @@
+import os
+import queue
+import threading
+import time
+import atexit
+
+# Pool settings (override with environment variables)
+POOL_SIZE = int(os.environ.get("BROWSER_POOL_SIZE", "2"))
+MAX_USES = int(os.environ.get("BROWSER_MAX_USES", "50"))
+
+
+class _Job:
+    def __init__(self, fn, timer=None):
+        self.fn = fn
+        self.timer = timer
+        self.queued_at = time.monotonic()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class BrowserPool:
+    """
+    Keeps a few Chromium processes running between lookups.
+
+    Playwright's sync API only works on the thread that started it, so each
+    browser lives on its own worker thread and lookups are handed over as jobs.
+    Every job gets a fresh browser context (own cookies/storage) which is
+    closed as soon as the job is done. A browser is relaunched after
+    `max_uses` lookups or when it has crashed.
+    """
+
+    def __init__(self, size=POOL_SIZE, max_uses=MAX_USES, headless=True):
+        self.size = max(1, size)
+        self.max_uses = max(1, max_uses)
+        self.headless = headless
+        self._jobs = queue.Queue()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._busy = 0
+        self.stats = {
+            "lookups": 0,
+            "hits": 0,          # lookups served by an already running browser
+            "launches": 0,
+            "recycles": 0,
+            "crashes": 0,
+            "wait_time": 0.0,   # total seconds jobs spent waiting for a browser
+        }
+
+    def run(self, fn, timer=None):
+        """
+        Run `fn(page)` on a pooled browser and return its result.
+        Exceptions raised by `fn` are re-raised in the calling thread.
+        The time until the page was ready (queue + launch + new context) is
+        recorded on `timer` as "browser_acquire".
+        """
+        self._start()
+        job = _Job(fn, timer)
+        self._jobs.put(job)
+        job.done.wait()
+        if job.error is not None:
+            raise job.error
+        return job.result
+
+    def warm(self, timeout=120):
+        """
+        Start the workers and launch every browser now, instead of on the
+        first lookups. Each worker holds its warm-up job until all have one,
+        so no worker takes two.
+        """
+        self._start()
+        barrier = threading.Barrier(self.size)
+        jobs = [_Job(lambda page: barrier.wait(timeout)) for _ in range(self.size)]
+        for job in jobs:
+            self._jobs.put(job)
+        pending = list(jobs)
+        while pending:
+            pending[0].done.wait(0.1)
+            for job in [job for job in pending if job.done.is_set()]:
+                pending.remove(job)
+                if job.error is not None:
+                    barrier.abort()  # don't keep the browsers that did start waiting
+                    raise job.error
+
+    def snapshot(self):
+        with self._lock:
+            data = dict(self.stats)
+            data["size"] = self.size
+            data["busy"] = self._busy
+            data["queued"] = self._jobs.qsize()
+            data["headless"] = self.headless
+        data["avg_wait"] = round(data["wait_time"] / data["lookups"], 4) if data["lookups"] else 0.0
+        data["wait_time"] = round(data["wait_time"], 4)
+        return data
+
+    def close(self):
+        with self._lock:
+            threads = self._threads
+            self._threads = []
+        for _ in threads:
+            self._jobs.put(None)
+        for t in threads:
+            t.join(timeout=10)
+
+    def _start(self):
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.size):
+                t = threading.Thread(target=self._worker, name=f"browser-pool-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def _worker(self):
+        from playwright.sync_api import sync_playwright  # only processes that use a browser pay for it
+        with sync_playwright() as p:
+            browser = None
+            uses = 0
+            while True:
+                job = self._jobs.get()
+                if job is None:
+                    break
+
+                with self._lock:
+                    self.stats["lookups"] += 1
+                    self.stats["wait_time"] += time.monotonic() - job.queued_at
+                    self._busy += 1
+
+                # Recycle worn out or dead browsers before handing them out
+                if browser is not None and (uses >= self.max_uses or not browser.is_connected()):
+                    self._count("recycles")
+                    _close_quietly(browser)
+                    browser = None
+
+                context = None
+                try:
+                    if browser is None:
+                        browser = p.chromium.launch(headless=self.headless)
+                        uses = 0
+                        self._count("launches")
+                    else:
+                        self._count("hits")
+                    uses += 1
+
+                    context = browser.new_context()
+                    page = context.new_page()
+                    if job.timer is not None:
+                        job.timer.add("browser_acquire", time.monotonic() - job.queued_at)
+                    job.result = job.fn(page)
+                except Exception as e:
+                    job.error = e
+                    if browser is not None and not browser.is_connected():
+                        self._count("crashes")
+                        browser = None
+                finally:
+                    if context is not None:
+                        _close_quietly(context)
+                    with self._lock:
+                        self._busy -= 1
+                    job.done.set()
+
+            if browser is not None:
+                _close_quietly(browser)
+
+
+def _close_quietly(obj):
+    try:
+        obj.close()
+    except Exception:
+        pass
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(headless=True):
+    """Shared pool for the given headless mode (created on first use)."""
+    with _pools_lock:
+        pool = _pools.get(headless)
+        if pool is None:
+            pool = BrowserPool(headless=headless)
+            _pools[headless] = pool
+        return pool
+
+
+def pool_stats():
+    with _pools_lock:
+        pools = list(_pools.values())
+    return [pool.snapshot() for pool in pools]
+
+
+@atexit.register
+def _shutdown():
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close()
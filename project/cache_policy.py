@@ -0,0 +1,126 @@
+import os
+import threading
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+# How long a cached row counts as fresh, per kind of result (seconds)
+TTL_DISPOSED = int(os.environ.get("CACHE_TTL_DISPOSED", str(30 * 24 * 3600)))
+TTL_PENDING = int(os.environ.get("CACHE_TTL_PENDING", str(12 * 3600)))
+TTL_NEGATIVE = int(os.environ.get("CACHE_TTL_NEGATIVE", str(24 * 3600)))
+TTL_ERROR = int(os.environ.get("CACHE_TTL_ERROR", "300"))
+# How long past its TTL a case is still served (while refreshing in the background)
+MAX_STALE = int(os.environ.get("CACHE_MAX_STALE", str(7 * 24 * 3600)))
+# Background refreshes running at the same time
+REFRESH_WORKERS = int(os.environ.get("CACHE_REFRESH_WORKERS", "2"))
+
+TTLS = {
+    "disposed": TTL_DISPOSED,
+    "pending": TTL_PENDING,
+    "negative": TTL_NEGATIVE,
+    "error": TTL_ERROR,
+}
+
+
+def now_iso():
+    """Timestamp format stored in scrape_history.scraped_at (UTC)."""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def classify(status):
+    if not status or status == "Not Found":
+        return "negative"
+    if status.startswith("Error:"):
+        return "error"
+    if "DISPOSED" in status.upper():
+        return "disposed"
+    return "pending"
+
+
+def _parse_scraped_at(value):
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+
+
+def _parse_hearing_date(value):
+    # ISO dates ("2023-01-23"); rows scraped before dates were normalised say "23/01/2023"
+    for fmt in ("%Y-%m-%d", "%d/%m/%Y"):
+        try:
+            return datetime.strptime((value or "").strip(), fmt).replace(tzinfo=timezone.utc)
+        except ValueError:
+            continue
+    return None
+
+
+def evaluate(status, scraped_at, next_date=None, now=None):
+    """
+    Freshness of one cached row. Returns a dict with:
+      kind  - disposed / pending / negative / error
+      state - fresh / stale (serve, refresh in background) / expired (scrape now)
+      age   - seconds since the row was scraped (None for rows older than this policy)
+      ttl   - seconds the row stays fresh
+    """
+    now = now or datetime.now(timezone.utc)
+    kind = classify(status)
+    ttl = TTLS[kind]
+    scraped = _parse_scraped_at(scraped_at)
+
+    if scraped is None:
+        # Rows written before scraped_at existed: usable, but worth refreshing
+        return {"kind": kind, "state": "stale", "age": None, "ttl": ttl}
+
+    age = max(0.0, (now - scraped).total_seconds())
+    if age <= ttl:
+        state = "fresh"
+        # A pending case whose next hearing has passed since we scraped it has news
+        hearing = _parse_hearing_date(next_date) if kind == "pending" else None
+        if hearing is not None and scraped < hearing <= now:
+            state = "stale"
+    elif age <= ttl + MAX_STALE:
+        state = "stale"
+    else:
+        state = "expired"
+    return {"kind": kind, "state": state, "age": round(age), "ttl": ttl}
+
+
+class BackgroundRefresher:
+    """
+    Runs stale-while-revalidate refreshes on a small thread pool.
+    A key that is already queued or running is not queued again.
+    """
+
+    def __init__(self, workers=REFRESH_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="cache-refresh")
+        self._pending = set()
+        self._lock = threading.Lock()
+        self.stats = {"queued": 0, "skipped": 0, "done": 0, "failed": 0}
+
+    def refresh(self, key, fn):
+        with self._lock:
+            if key in self._pending:
+                self.stats["skipped"] += 1
+                return False
+            self._pending.add(key)
+            self.stats["queued"] += 1
+        self._executor.submit(self._run, key, fn)
+        return True
+
+    def _run(self, key, fn):
+        try:
+            fn()
+            outcome = "done"
+        except Exception as e:
+            print(f"Background refresh error for {key}: {e}")
+            outcome = "failed"
+        with self._lock:
+            self._pending.discard(key)
+            self.stats[outcome] += 1
+
+    def snapshot(self):
+        with self._lock:
+            data = dict(self.stats)
+            data["pending"] = len(self._pending)
+        return data
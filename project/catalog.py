@@ -0,0 +1,170 @@
+import os
+import re
+import json
+import threading
+import time
+from datetime import date
+from project.config import CASE_STATUS_URL, COURT_BASE_URL
+from project.http_sessions import get_session_pool
+from project.parser import LayoutChanged
+
+# Case types / years read from the court's form, kept between restarts
+CATALOG_FILE = os.environ.get("CATALOG_FILE", "catalog.json")
+# Seconds before the form is read again
+CATALOG_MAX_AGE = int(os.environ.get("CATALOG_MAX_AGE", str(24 * 3600)))
+
+CASE_NUMBER_RE = re.compile(r'^\d{1,8}$')
+
+# Offered until the form has been read once (not used to reject case types)
+DEFAULT_CASE_TYPES = [
+    {"value": "CRL.A.", "label": "CRL.A. (Criminal Appeal)"},
+    {"value": "WP(C)", "label": "WP(C) (Writ Petition Civil)"},
+    {"value": "CRL.REV.", "label": "CRL.REV. (Criminal Revision)"},
+    {"value": "CRL.M.C.", "label": "CRL.M.C. (Criminal Misc)"},
+    {"value": "CS(OS)", "label": "CS(OS) (Civil Suit Original Side)"},
+    {"value": "FAO", "label": "FAO (First Appeal from Order)"},
+]
+
+
+def default_years():
+    return [str(year) for year in range(date.today().year, 1949, -1)]
+
+
+def parse_form_options(html):
+    """(case_types, years) from the <select>s of the case status form."""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    selects = {name: soup.find('select', {'name': name}) for name in ("case_type", "case_year")}
+    if not all(selects.values()):
+        raise LayoutChanged("Case type / year selects not found")
+
+    def options(select):
+        for option in select.find_all('option'):
+            value = (option.get('value') or '').strip()
+            if value:
+                yield value, " ".join(option.get_text().split()) or value
+
+    case_types = [{"value": value, "label": label} for value, label in options(selects["case_type"])]
+    years = sorted({value for value, _ in options(selects["case_year"])}, reverse=True)
+    if not case_types or not years:
+        raise LayoutChanged("Case type / year selects are empty")
+    return case_types, years
+
+
+class Catalog:
+    """
+    Valid case types and years, checked in memory before anything is scraped.
+    Loaded from CATALOG_FILE and re-read from the court's form in the
+    background once it is older than `max_age`. The file records the site
+    it was read from; one read from another COURT_BASE_URL (a simulator)
+    is ignored.
+    """
+
+    def __init__(self, path=CATALOG_FILE, max_age=CATALOG_MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._next_try = 0.0  # after a failed refresh, wait a bit before trying again
+        self._set(DEFAULT_CASE_TYPES, default_years(), "default", 0.0)
+        self._load()
+
+    def _set(self, case_types, years, source, fetched_at):
+        # Swapped in one go; readers never see half a catalog
+        self._data = {
+            "case_types": case_types,
+            "years": years,
+            "source": source,
+            "fetched_at": fetched_at,
+            "type_set": frozenset(t["value"] for t in case_types),
+            "year_set": frozenset(years),
+        }
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                saved = json.load(f)
+            if saved.get("base_url") != COURT_BASE_URL:
+                print(f"Ignoring catalog file {self.path}: read from {saved.get('base_url') or 'an unknown site'}, not {COURT_BASE_URL}")
+                return
+            self._set(saved["case_types"], saved["years"], "site", float(saved["fetched_at"]))
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            print(f"Ignoring unreadable catalog file {self.path}: {e}")
+
+    @property
+    def case_types(self):
+        return self._data["case_types"]
+
+    @property
+    def years(self):
+        return self._data["years"]
+
+    def validate(self, case_type, case_number, case_year):
+        """Error message for input the court's form would not accept, else None."""
+        self.refresh_if_stale()
+        data = self._data
+        if not CASE_NUMBER_RE.match(case_number or ""):
+            return "Case number should be digits only."
+        if case_year not in data["year_set"]:
+            return f"Unknown case year: {case_year}."
+        # The built-in list is only a sample; only the site's list can rule a type out
+        if data["source"] == "site" and case_type not in data["type_set"]:
+            return f"Unknown case type: {case_type}."
+        return None
+
+    def refresh(self):
+        """Read the options from the court's form and save them."""
+        from project.backup_scraper import court_request
+        pool = get_session_pool()
+        warm = pool.acquire()
+        try:
+            response = court_request(warm.session, 'GET', CASE_STATUS_URL)
+            case_types, years = parse_form_options(response.text)
+            warm.load_form(response.text)  # the session can submit right away
+        except Exception:
+            pool.release(warm, healthy=False)
+            raise
+        pool.release(warm)
+
+        fetched_at = time.time()
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"base_url": COURT_BASE_URL, "case_types": case_types, "years": years, "fetched_at": fetched_at}, f)
+        os.replace(tmp_path, self.path)
+        self._set(case_types, years, "site", fetched_at)
+        print(f"📚 Catalog refreshed: {len(case_types)} case types, {len(years)} years")
+
+    def stale(self):
+        return time.time() - self._data["fetched_at"] >= self.max_age
+
+    def refresh_if_stale(self):
+        """Start a background refresh when the catalog is too old (at most one at a time)."""
+        if not self.stale() or time.time() < self._next_try:
+            return False
+        with self._lock:
+            if self._refreshing:
+                return False
+            self._refreshing = True
+        threading.Thread(target=self._background_refresh, name="catalog-refresh", daemon=True).start()
+        return True
+
+    def _background_refresh(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            print(f"Catalog refresh error: {e}")
+            self._next_try = time.time() + 300
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def to_dict(self):
+        data = self._data
+        return {
+            "case_types": data["case_types"],
+            "years": data["years"],
+            "source": data["source"],
+            "age": round(time.time() - data["fetched_at"]) if data["fetched_at"] else None,
+        }
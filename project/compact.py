@@ -0,0 +1,118 @@
+"""
+Collapse an existing history database into change-only form (run it with
+the app stopped):
+
+    python -m project.compact history.db
+    python -m project.compact history.db --dry-run
+
+- parties text is moved into the parties table (one copy per distinct text)
+- a row equal to the case's previous answer is dropped; the row it repeats
+  keeps the time of the last confirmation in checked_at
+- error rows are dropped unless they are the case's latest row
+- the file is VACUUMed and the space saved is reported
+
+The schema is upgraded first, even for --dry-run.
+"""
+import os
+import argparse
+import sqlite3
+from project.db import migrate
+from project.history import is_error
+
+# Row ids deleted / updated per executemany
+WRITE_BATCH = 1000
+
+
+def file_size(path):
+    return sum(os.path.getsize(p) for p in (path, path + "-wal") if os.path.exists(p))
+
+
+def plan(conn):
+    """
+    Walk every case's rows oldest first; returns (rows to delete,
+    {kept rowid: checked_at}).
+    """
+    deletes, confirmed = [], {}
+    rows = conn.execute(
+        "SELECT rowid, case_type, case_number, case_year, status, parties_id, last_date, next_date, court_no, pdf_link, "
+        "COALESCE(checked_at, scraped_at) FROM scrape_history ORDER BY case_type, case_number, case_year, rowid")
+    case = kept = error = None
+    for row in rows:
+        rowid, key, checked_at = row[0], row[4:10], row[10]
+        if row[1:4] != case:
+            case, kept, error = row[1:4], None, None
+        if is_error(row[4]):
+            # Only the newest error of a run matters, and only if nothing came after it
+            if error is not None:
+                deletes.append(error)
+            error = rowid
+            continue
+        if error is not None:
+            deletes.append(error)
+            error = None
+        if kept is not None and kept[1] == key:
+            deletes.append(rowid)
+            confirmed[kept[0]] = checked_at
+        else:
+            kept = (rowid, key)
+    return deletes, confirmed
+
+
+def compact(path, dry_run=False):
+    migrate(path)
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        size_before = file_size(path)
+        rows_before = conn.execute("SELECT COUNT(*) FROM scrape_history").fetchone()[0]
+
+        conn.execute("BEGIN IMMEDIATE")
+        # Intern parties first so repeats compare by id
+        conn.execute("INSERT OR IGNORE INTO parties (text) SELECT DISTINCT parties FROM scrape_history WHERE parties IS NOT NULL AND parties_id IS NULL")
+        interned = conn.execute(
+            "UPDATE scrape_history SET parties_id = (SELECT id FROM parties WHERE text = scrape_history.parties), parties = NULL "
+            "WHERE parties IS NOT NULL AND parties_id IS NULL").rowcount
+
+        deletes, confirmed = plan(conn)
+        for i in range(0, len(deletes), WRITE_BATCH):
+            conn.executemany("DELETE FROM scrape_history WHERE rowid = ?", [(rowid,) for rowid in deletes[i:i + WRITE_BATCH]])
+        conn.executemany("UPDATE scrape_history SET checked_at = ? WHERE rowid = ?",
+                         [(checked_at, rowid) for rowid, checked_at in confirmed.items()])
+        # Parties no row points at any more
+        conn.execute("DELETE FROM parties WHERE id NOT IN (SELECT parties_id FROM scrape_history WHERE parties_id IS NOT NULL)")
+
+        if dry_run:
+            conn.rollback()
+            print(f"Would remove {len(deletes)} of {rows_before} history rows and intern parties of {interned} rows (dry run, nothing written)")
+            return None
+
+        conn.commit()
+        conn.execute("VACUUM")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        result = {
+            "rows_before": rows_before,
+            "rows_after": rows_before - len(deletes),
+            "parties": conn.execute("SELECT COUNT(*) FROM parties").fetchone()[0],
+            "bytes_before": size_before,
+            "bytes_after": file_size(path),
+        }
+    finally:
+        conn.close()
+
+    saved = result["bytes_before"] - result["bytes_after"]
+    print(f"🗜️ {path}: {result['rows_before']} -> {result['rows_after']} history rows, "
+          f"{result['parties']} distinct parties, "
+          f"{result['bytes_before'] / 1024:.0f} KB -> {result['bytes_after'] / 1024:.0f} KB "
+          f"(saved {saved / 1024:.0f} KB, {saved / max(result['bytes_before'], 1):.0%})")
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("database", nargs="?", default=os.environ.get("HISTORY_DB", "history.db"))
+    parser.add_argument("--dry-run", action="store_true", help="report what would be removed without writing")
+    args = parser.parse_args(argv)
+    compact(args.database, dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
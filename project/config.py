@@ -0,0 +1,34 @@
+import os
+from dataclasses import dataclass, fields
+
+# Delhi High Court website (point COURT_BASE_URL at benchmarks/court_sim.py for load tests)
+COURT_BASE_URL = os.environ.get("COURT_BASE_URL", "https://delhihighcourt.nic.in").rstrip("/")
+# Case status form
+CASE_STATUS_URL = COURT_BASE_URL + "/app/get-case-type-status"
+
+
+@dataclass
+class ScrapeTimeouts:
+    """
+    Per-step timeouts (milliseconds) for the Playwright scrapers.
+    Every field can be overridden with SCRAPE_TIMEOUT_<FIELD>, e.g.
+    SCRAPE_TIMEOUT_RESULTS_TABLE=12000.
+    """
+    navigation: int = 60000        # loading the case status form
+    form_ready: int = 10000        # captcha + form fields rendered
+    search_response: int = 15000   # response to the search submit
+    results_table: int = 8000      # result rows attached to the table
+    orders_page: int = 30000       # loading the Orders page
+    orders_links: int = 10000      # PDF links attached on the Orders page
+
+    @classmethod
+    def from_env(cls):
+        values = {}
+        for f in fields(cls):
+            raw = os.environ.get(f"SCRAPE_TIMEOUT_{f.name.upper()}")
+            if raw:
+                values[f.name] = int(raw)
+        return cls(**values)
+
+
+TIMEOUTS = ScrapeTimeouts.from_env()
@@ -0,0 +1,127 @@
+import sqlite3
+import threading
+
+_local = threading.local()
+
+
+def _v1_history_table(cursor):
+    # Base table plus the columns that older databases may be missing
+    cursor.execute("CREATE TABLE IF NOT EXISTS scrape_history (case_type TEXT, case_number TEXT, case_year TEXT, status TEXT, parties TEXT, last_date TEXT, next_date TEXT, court_no TEXT, pdf_link TEXT, scraped_at TEXT)")
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(scrape_history)")}
+    for column in ("pdf_link", "scraped_at"):
+        if column not in columns:
+            cursor.execute(f"ALTER TABLE scrape_history ADD COLUMN {column} TEXT")
+
+
+def _v2_case_index(cursor):
+    # Cache lookups filter on the case identity and read the newest rowid first
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_history_case ON scrape_history (case_type, case_number, case_year)")
+
+
+def _v3_iso_dates(cursor):
+    # "23/01/2023" -> "2023-01-23", "NA" / blanks -> NULL
+    for column in ("last_date", "next_date"):
+        cursor.execute(f"UPDATE scrape_history SET {column} = substr({column}, 7, 4) || '-' || substr({column}, 4, 2) || '-' || substr({column}, 1, 2) WHERE {column} GLOB '[0-9][0-9]/[0-9][0-9]/[0-9][0-9][0-9][0-9]'")
+        cursor.execute(f"UPDATE scrape_history SET {column} = NULL WHERE trim({column}) IN ('', 'NA', 'N/A')")
+
+
+def _v4_pdf_store(cursor):
+    # Downloaded order PDFs (project/pdf_store.py): content hash -> file, court URL -> hash
+    cursor.execute("CREATE TABLE IF NOT EXISTS pdf_files (sha256 TEXT PRIMARY KEY, size INTEGER NOT NULL, last_used REAL NOT NULL)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_pdf_files_last_used ON pdf_files (last_used)")
+    cursor.execute("CREATE TABLE IF NOT EXISTS pdf_urls (url TEXT PRIMARY KEY, sha256 TEXT NOT NULL)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_pdf_urls_sha256 ON pdf_urls (sha256)")
+
+
+def _v5_case_orders(cursor):
+    # Full order history per case (the UNIQUE index doubles as the per-case lookup index)
+    cursor.execute("CREATE TABLE IF NOT EXISTS case_orders (case_type TEXT, case_number TEXT, case_year TEXT, order_date TEXT, pdf_url TEXT NOT NULL, label TEXT, first_seen TEXT, UNIQUE (case_type, case_number, case_year, pdf_url))")
+
+
+def _v6_watch_list(cursor):
+    # Cases re-scraped by project/watcher.py, and the changes it found
+    cursor.execute("CREATE TABLE IF NOT EXISTS watch_list (case_type TEXT, case_number TEXT, case_year TEXT, added_at TEXT, PRIMARY KEY (case_type, case_number, case_year))")
+    cursor.execute("CREATE TABLE IF NOT EXISTS case_changes (id INTEGER PRIMARY KEY, case_type TEXT, case_number TEXT, case_year TEXT, changed_at TEXT, changes TEXT)")
+
+
+def _v7_leases(cursor):
+    # Expiring claims shared by every process using this file (project/leases.py)
+    cursor.execute("CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)")
+
+
+def _v8_change_history(cursor):
+    # History rows become change events: an unchanged re-scrape only moves checked_at,
+    # and parties text is stored once in `parties` (old rows keep theirs until compacted)
+    cursor.execute("CREATE TABLE IF NOT EXISTS parties (id INTEGER PRIMARY KEY, text TEXT NOT NULL UNIQUE)")
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(scrape_history)")}
+    for column, kind in (("parties_id", "INTEGER"), ("checked_at", "TEXT")):
+        if column not in columns:
+            cursor.execute(f"ALTER TABLE scrape_history ADD COLUMN {column} {kind}")
+    # What readers use: parties resolved, checked_at = last time the site confirmed the row
+    cursor.execute("""CREATE VIEW IF NOT EXISTS case_history AS
+        SELECT h.rowid AS id, h.case_type, h.case_number, h.case_year, h.status,
+               COALESCE(p.text, h.parties) AS parties, h.last_date, h.next_date, h.court_no, h.pdf_link,
+               h.scraped_at, COALESCE(h.checked_at, h.scraped_at) AS checked_at, h.parties_id
+        FROM scrape_history h LEFT JOIN parties p ON p.id = h.parties_id""")
+
+
+def _v9_batch_jobs(cursor):
+    # Batch jobs and their results, so any worker can answer a poll / stream (project/batch.py)
+    cursor.execute("CREATE TABLE IF NOT EXISTS batch_jobs (id TEXT PRIMARY KEY, cases TEXT NOT NULL, created_at REAL NOT NULL, finished_at REAL)")
+    cursor.execute("CREATE TABLE IF NOT EXISTS batch_results (job_id TEXT NOT NULL, seq INTEGER NOT NULL, line TEXT NOT NULL, PRIMARY KEY (job_id, seq))")
+
+
+# (version, step) - append new steps, never edit old ones
+MIGRATIONS = [
+    (1, _v1_history_table),
+    (2, _v2_case_index),
+    (3, _v3_iso_dates),
+    (4, _v4_pdf_store),
+    (5, _v5_case_orders),
+    (6, _v6_watch_list),
+    (7, _v7_leases),
+    (8, _v8_change_history),
+    (9, _v9_batch_jobs),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def migrate(path):
+    """
+    Bring the database at `path` up to SCHEMA_VERSION and switch it to WAL.
+    Safe to call on every start, from several processes at once; finished
+    steps are skipped (PRAGMA user_version).
+    """
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        # Workers starting together take the write lock in turn; later ones see the new version
+        conn.execute("BEGIN IMMEDIATE")
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for step_version, step in MIGRATIONS:
+            if step_version <= version:
+                continue
+            cursor = conn.cursor()
+            step(cursor)
+            cursor.execute(f"PRAGMA user_version = {step_version}")
+            print(f"Database migrated to schema version {step_version}")
+        conn.commit()
+        return max(version, SCHEMA_VERSION)
+    finally:
+        conn.close()
+
+
+def get_connection(path):
+    """
+    Connection reused by the calling thread (sqlite3 connections are not
+    shared between threads). Callers must not close it.
+    """
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(path)
+    if conn is None:
+        conn = sqlite3.connect(path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")  # safe with WAL, fewer fsyncs
+        connections[path] = conn
+    return conn
@@ -0,0 +1,125 @@
+import os
+import threading
+import importlib
+import sys
+from project.parser import LayoutChanged
+
+# Engines to try, in order. The next engine is only used when the previous
+# one can't read the site (JS-only page / layout change).
+ENGINE_ORDER = os.environ.get("SCRAPER_ENGINES", "http,playwright")
+
+# Modules behind each engine (requests / bs4 / Playwright), imported on first use
+ENGINE_MODULES = {
+    "http": "project.backup_scraper",
+    "playwright": "project.lookup",
+}
+
+
+class HttpEngine:
+    """requests + BeautifulSoup; tens of MB per lookup."""
+    name = "http"
+
+    def lookup(self, case_type, case_number, case_year):
+        from project.backup_scraper import lookup_case_http
+        return lookup_case_http(case_type, case_number, case_year)
+
+
+class PlaywrightEngine:
+    """Pooled Chromium; handles pages that need JavaScript."""
+    name = "playwright"
+
+    def lookup(self, case_type, case_number, case_year):
+        from project.lookup import lookup_case
+        return lookup_case(case_type, case_number, case_year, headless=True, raise_errors=True)
+
+
+ENGINES = {
+    HttpEngine.name: HttpEngine,
+    PlaywrightEngine.name: PlaywrightEngine,
+}
+
+
+class EngineRouter:
+    """
+    Runs a lookup on the first engine that can handle the site and keeps
+    per-engine counters. A "not found" answer is trusted as-is; only
+    LayoutChanged moves the lookup on to the next engine.
+    """
+
+    def __init__(self, engines):
+        if not engines:
+            raise ValueError("At least one scraper engine is required")
+        self.engines = engines
+        self._lock = threading.Lock()
+        self._stats = {
+            engine.name: {"attempts": 0, "found": 0, "not_found": 0, "fallbacks": 0, "errors": 0}
+            for engine in engines
+        }
+
+    def lookup(self, case_type, case_number, case_year):
+        """
+        Returns (case_info, engine_name). case_info has a `pdf_link` key,
+        or is None when the case was not found.
+        """
+        last_error = None
+        for engine in self.engines:
+            self._count(engine.name, "attempts")
+            try:
+                case_info = engine.lookup(case_type, case_number, case_year)
+            except LayoutChanged as e:
+                print(f"{engine.name} engine can't read the page ({e}), falling back...")
+                self._count(engine.name, "fallbacks")
+                last_error = e
+                continue
+            except Exception:
+                self._count(engine.name, "errors")
+                raise
+            self._count(engine.name, "found" if case_info else "not_found")
+            return case_info, engine.name
+        raise last_error
+
+    def pdf_url(self, case_type, case_number, case_year):
+        case_info, _ = self.lookup(case_type, case_number, case_year)
+        return case_info.get('pdf_link') if case_info else None
+
+    def stats(self):
+        with self._lock:
+            data = {name: dict(values) for name, values in self._stats.items()}
+        for values in data.values():
+            answered = values["found"] + values["not_found"]
+            values["success_rate"] = round(answered / values["attempts"], 4) if values["attempts"] else None
+        return data
+
+    def _count(self, name, key):
+        with self._lock:
+            self._stats[name][key] += 1
+
+
+def load_engines(names):
+    """Import the scraper modules of `names` now instead of on the first scrape."""
+    for name in names:
+        importlib.import_module(ENGINE_MODULES[name])
+
+
+def loaded_engines():
+    return [name for name, module in ENGINE_MODULES.items() if module in sys.modules]
+
+
+def build_router(order=ENGINE_ORDER):
+    names = [name.strip() for name in order.split(",") if name.strip()]
+    unknown = [name for name in names if name not in ENGINES]
+    if unknown:
+        raise ValueError(f"Unknown scraper engine(s): {', '.join(unknown)}")
+    return EngineRouter([ENGINES[name]() for name in names])
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_router():
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = build_router()
+        return _router
@@ -0,0 +1,147 @@
+import os
+import math
+import queue
+import threading
+import time
+
+# Scrapes running at the same time (each may hold a browser)
+SCRAPE_WORKERS = int(os.environ.get("SCRAPE_WORKERS", "4"))
+# Scrapes allowed to wait for a worker before new ones are turned away
+SCRAPE_QUEUE_SIZE = int(os.environ.get("SCRAPE_QUEUE_SIZE", "32"))
+# Seconds a caller waits for its scrape (queue time included)
+SCRAPE_JOB_TIMEOUT = float(os.environ.get("SCRAPE_JOB_TIMEOUT", "90"))
+
+
+class QueueFull(Exception):
+    """The scrape queue is full; try again after `retry_after` seconds."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Scrape queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class JobTimeout(Exception):
+    """The scrape did not finish within the job timeout."""
+
+
+class _Job:
+    def __init__(self, fn, on_skip=None):
+        self.fn = fn
+        self.on_skip = on_skip
+        self.queued_at = time.monotonic()
+        self.done = threading.Event()
+        self.cancelled = False
+        self.result = None
+        self.error = None
+
+
+class ScrapeExecutor:
+    """
+    Fixed set of worker threads with a bounded queue, so scrapes don't run
+    on (and pile up in) the web server's request threads.
+    """
+
+    def __init__(self, workers=SCRAPE_WORKERS, queue_size=SCRAPE_QUEUE_SIZE, job_timeout=SCRAPE_JOB_TIMEOUT):
+        self.workers = max(1, workers)
+        self.job_timeout = job_timeout
+        self._queue = queue.Queue(maxsize=max(1, queue_size))
+        self._lock = threading.Lock()
+        self._threads = []
+        self._busy = 0
+        self._started_at = time.monotonic()
+        self.stats = {
+            "submitted": 0,
+            "rejected": 0,
+            "completed": 0,
+            "failed": 0,
+            "timed_out": 0,
+            "wait_time": 0.0,   # seconds jobs spent queued
+            "run_time": 0.0,    # seconds workers spent running jobs
+        }
+
+    def run(self, fn, block=False, on_skip=None):
+        """
+        Run `fn()` on a worker and return its result.
+        Raises QueueFull when the queue is full (unless `block`, which waits
+        for room) and JobTimeout when the job takes longer than job_timeout.
+        `on_skip()` runs on the worker instead of `fn` when the job timed out
+        before it was picked up.
+        """
+        self._start()
+        job = _Job(fn, on_skip)
+        try:
+            self._queue.put(job, block=block, timeout=self.job_timeout if block else None)
+        except queue.Full:
+            with self._lock:
+                self.stats["rejected"] += 1
+            raise QueueFull(self.retry_after())
+        with self._lock:
+            self.stats["submitted"] += 1
+
+        remaining = self.job_timeout - (time.monotonic() - job.queued_at)
+        if not job.done.wait(max(0.0, remaining)):
+            job.cancelled = True  # skipped if no worker picked it up yet
+            with self._lock:
+                self.stats["timed_out"] += 1
+            raise JobTimeout(f"Scrape did not finish within {self.job_timeout:.0f}s")
+        if job.error is not None:
+            raise job.error
+        return job.result
+
+    def retry_after(self):
+        """Rough seconds until a queue slot frees up."""
+        with self._lock:
+            finished = self.stats["completed"] + self.stats["failed"]
+            avg_run = self.stats["run_time"] / finished if finished else 10.0
+        waiting = self._queue.qsize() + 1
+        return max(1, math.ceil(avg_run * waiting / self.workers))
+
+    def snapshot(self):
+        uptime = max(time.monotonic() - self._started_at, 1e-9)
+        with self._lock:
+            data = dict(self.stats)
+            data["busy"] = self._busy
+            started = data["completed"] + data["failed"]
+        data["workers"] = self.workers
+        data["queue_depth"] = self._queue.qsize()
+        data["queue_size"] = self._queue.maxsize
+        data["avg_wait"] = round(data["wait_time"] / started, 4) if started else 0.0
+        data["utilization"] = round(data["run_time"] / (uptime * self.workers), 4)
+        data["wait_time"] = round(data["wait_time"], 4)
+        data["run_time"] = round(data["run_time"], 4)
+        return data
+
+    def _start(self):
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                t = threading.Thread(target=self._worker, name=f"scrape-worker-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def _worker(self):
+        while True:
+            job = self._queue.get()
+            if job.cancelled:
+                if job.on_skip is not None:
+                    try:
+                        job.on_skip()
+                    except Exception as e:
+                        print(f"Skipped job cleanup error: {e}")
+                continue
+            started = time.monotonic()
+            with self._lock:
+                self._busy += 1
+                self.stats["wait_time"] += started - job.queued_at
+            try:
+                job.result = job.fn()
+                outcome = "completed"
+            except Exception as e:
+                job.error = e
+                outcome = "failed"
+            with self._lock:
+                self._busy -= 1
+                self.stats[outcome] += 1
+                self.stats["run_time"] += time.monotonic() - started
+            job.done.set()
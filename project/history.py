@@ -0,0 +1,174 @@
+import csv
+import io
+import json
+
+COLUMNS = ("case_type", "case_number", "case_year", "status", "parties",
+           "last_date", "next_date", "court_no", "pdf_link", "scraped_at", "checked_at")
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+# Rows pulled from SQLite per fetch while streaming
+STREAM_BATCH = 500
+# What makes a case row different from the one before it
+CASE_FIELDS = ("status", "parties", "last_date", "next_date", "court_no", "pdf_link")
+
+
+def is_error(status):
+    return (status or "").startswith("Error:")
+
+
+def intern_parties(conn, text):
+    """Id of `text` in the parties table (added if new), None for no text."""
+    if text is None:
+        return None
+    conn.execute("INSERT OR IGNORE INTO parties (text) VALUES (?)", (text,))
+    return conn.execute("SELECT id FROM parties WHERE text = ?", (text,)).fetchone()[0]
+
+
+def _latest(conn, case_type, case_number, case_year):
+    return conn.execute(
+        f"SELECT id, {', '.join(CASE_FIELDS)} FROM case_history WHERE case_type = ? AND case_number = ? AND case_year = ? ORDER BY id DESC LIMIT 1",
+        (case_type, case_number, case_year)).fetchone()
+
+
+def _latest_answer(conn, case_type, case_number, case_year):
+    """
+    Newest row that is an answer from the site (case data or "Not Found").
+    A trailing error row is dropped first: errors are only kept while they
+    are the latest thing we know.
+    """
+    latest = _latest(conn, case_type, case_number, case_year)
+    if latest and is_error(latest[1]):
+        conn.execute("DELETE FROM scrape_history WHERE rowid = ?", (latest[0],))
+        latest = _latest(conn, case_type, case_number, case_year)
+    return latest
+
+
+def _confirm_or_insert(conn, latest, values, insert_sql, insert_params, checked_at):
+    if latest is not None and tuple(latest[1:]) == values:
+        conn.execute("UPDATE scrape_history SET checked_at = ? WHERE rowid = ?", (checked_at, latest[0]))
+        return False
+    conn.execute(insert_sql, insert_params)
+    return True
+
+
+def record_case(conn, case_type, case_number, case_year, case_info, pdf_link, scraped_at):
+    """
+    Store a scraped case (the caller commits). A row is only added when
+    something differs from the last answer; otherwise that row's checked_at
+    moves. Returns True when a row was added.
+    """
+    status = case_info.get('status', 'N/A')
+    parties = case_info.get('parties', 'N/A')
+    last_date = case_info.get('last_hearing_date', 'N/A')
+    next_date = case_info.get('next_hearing_date', 'N/A')
+    court_no = case_info.get('court_no', 'N/A')
+    latest = _latest_answer(conn, case_type, case_number, case_year)
+    return _confirm_or_insert(
+        conn, latest, (status, parties, last_date, next_date, court_no, pdf_link),
+        "INSERT INTO scrape_history (case_type, case_number, case_year, status, parties_id, last_date, next_date, court_no, pdf_link, scraped_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (case_type, case_number, case_year, status, intern_parties(conn, parties), last_date, next_date, court_no, pdf_link, scraped_at),
+        scraped_at)
+
+
+def record_status(conn, case_type, case_number, case_year, status, scraped_at):
+    """
+    Store a "Not Found" / "Error: ..." answer (the caller commits), change-only
+    like record_case. Errors don't pile up: a new error replaces the last one.
+    """
+    insert_sql = "INSERT INTO scrape_history (case_type, case_number, case_year, status, scraped_at) VALUES (?, ?, ?, ?, ?)"
+    insert_params = (case_type, case_number, case_year, status, scraped_at)
+    if is_error(status):
+        latest = _latest(conn, case_type, case_number, case_year)
+        if latest and is_error(latest[1]):
+            conn.execute("UPDATE scrape_history SET status = ?, scraped_at = ?, checked_at = NULL WHERE rowid = ?",
+                         (status, scraped_at, latest[0]))
+            return False
+        conn.execute(insert_sql, insert_params)
+        return True
+    latest = _latest_answer(conn, case_type, case_number, case_year)
+    return _confirm_or_insert(conn, latest, (status, None, None, None, None, None), insert_sql, insert_params, scraped_at)
+
+
+def parse_filters(args):
+    """
+    Filters from the /history query string:
+      case_type, case_year, status  exact match
+      since, until                  scraped_at range (YYYY-MM-DD or full timestamp)
+      cursor                        only rows older than this cursor (keyset pagination)
+    Raises ValueError for bad values.
+    """
+    filters = {}
+    for key in ("case_type", "case_year", "status", "since", "until"):
+        value = (args.get(key) or "").strip()
+        if value:
+            filters[key] = value
+    cursor = args.get("cursor")
+    if cursor:
+        filters["cursor"] = int(cursor)
+    return filters
+
+
+def build_query(filters, limit=None):
+    where, params = [], []
+    for key in ("case_type", "case_year", "status"):
+        if key in filters:
+            where.append(f"{key} = ?")
+            params.append(filters[key])
+    if "since" in filters:
+        where.append("scraped_at >= ?")
+        params.append(filters["since"])
+    if "until" in filters:
+        # A bare date includes the whole day
+        until = filters["until"]
+        where.append("scraped_at < ?" if len(until) > 10 else "scraped_at < date(?, '+1 day')")
+        params.append(until)
+    if "cursor" in filters:
+        where.append("id < ?")
+        params.append(filters["cursor"])
+
+    sql = f"SELECT id, {', '.join(COLUMNS)} FROM case_history"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY id DESC"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    return sql, params
+
+
+def fetch_page(conn, filters, limit):
+    """One page of rows (newest first) and the cursor for the next page."""
+    sql, params = build_query(filters, limit)
+    rows = conn.execute(sql, params).fetchall()
+    next_cursor = rows[-1][0] if len(rows) == limit else None
+    return [list(row[1:]) for row in rows], next_cursor
+
+
+def iter_rows(conn, filters, limit=None):
+    """Rows (without id) straight from the cursor, a batch at a time."""
+    sql, params = build_query(filters, limit)
+    cursor = conn.execute(sql, params)
+    while True:
+        batch = cursor.fetchmany(STREAM_BATCH)
+        if not batch:
+            break
+        for row in batch:
+            yield row[1:]
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(dict(zip(COLUMNS, row))) + "\n"
+
+
+def csv_lines(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+    if buffer.getvalue():
+        yield buffer.getvalue()
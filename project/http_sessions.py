@@ -0,0 +1,166 @@
+import os
+import queue
+import threading
+import time
+from project.parser import LayoutChanged
+
+# Idle warm sessions kept for the HTTP engine
+HTTP_SESSION_POOL = int(os.environ.get("HTTP_SESSION_POOL", "4"))
+# Answers to the search POST that mean the CSRF token expired or was not accepted
+TOKEN_REFUSED = (403, 419)
+# How long / how many submissions a captcha + CSRF token is reused before the form is fetched again
+HTTP_FORM_MAX_AGE = float(os.environ.get("HTTP_FORM_MAX_AGE", "600"))
+HTTP_FORM_MAX_USES = int(os.environ.get("HTTP_FORM_MAX_USES", "20"))
+
+
+def form_fields(html):
+    """
+    Hidden inputs (CSRF token) of the case status form plus the solved
+    captcha, or None when the page has no captcha.
+    """
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    captcha_element = soup.find('span', {'id': 'captcha-code'})
+    if not captcha_element:
+        return None
+    fields = {}
+    form = captcha_element.find_parent('form')
+    if form:
+        fields = {
+            field['name']: field.get('value', '')
+            for field in form.find_all('input', {'type': 'hidden'})
+            if field.get('name')
+        }
+    fields['captchaInput'] = captcha_element.get_text().strip()
+    return fields
+
+
+def form_rejected(html):
+    """Form shown again without any results table: captcha / token not accepted."""
+    return '<table' not in html.lower() and form_fields(html) is not None
+
+
+class WarmSession:
+    """A requests.Session with keep-alive connections and the form state it last saw."""
+
+    def __init__(self, session=None):
+        if session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        # Any client with a cookie jar works (the async scraper passes an httpx.AsyncClient)
+        self.session = session
+        self.fields = None
+        self.loaded_at = 0.0
+        self.uses = 0
+
+    def ready(self):
+        """True while the stored captcha / token may still be submitted."""
+        return (self.fields is not None
+                and self.uses < HTTP_FORM_MAX_USES
+                and time.monotonic() - self.loaded_at < HTTP_FORM_MAX_AGE)
+
+    def load_form(self, html):
+        """Take the form state from a page that shows the form; False if it doesn't."""
+        fields = form_fields(html)
+        if fields is None:
+            return False
+        self.fields = fields
+        self.loaded_at = time.monotonic()
+        self.uses = 0
+        return True
+
+    def require_form(self, html):
+        """load_form for the form page itself, where a missing captcha means the layout changed."""
+        if not self.load_form(html):
+            raise LayoutChanged("Captcha element not found")
+
+    def take_answer(self, html):
+        """
+        After submitting the search: True when `html` is the answer (it
+        usually carries the next captcha / token, which is kept). False when
+        the form was refused (`html` is None for a 403 / 419): the form
+        state is dropped, or replaced if the error page shows a fresh form,
+        and the search is worth one retry.
+        """
+        if html is not None and not form_rejected(html):
+            self.load_form(html)
+            return True
+        self.forget_form()
+        if html is not None:
+            self.load_form(html)
+        return False
+
+    def forget_form(self):
+        self.fields = None
+
+    def form_data(self, case_type, case_number, case_year):
+        self.uses += 1
+        data = dict(self.fields)
+        data.update({
+            'case_type': case_type,
+            'case_number': case_number,
+            'case_year': case_year,
+        })
+        return data
+
+    def close(self):
+        self.session.close()
+
+
+class SessionPool:
+    """
+    Warm sessions handed out one caller at a time, most recently used first
+    (its connections are the likeliest to still be open).
+    """
+
+    def __init__(self, size=HTTP_SESSION_POOL):
+        self._idle = queue.LifoQueue(maxsize=max(1, size))
+        self._lock = threading.Lock()
+        self.stats = {"created": 0, "reused": 0, "discarded": 0, "form_loads": 0, "form_reuses": 0, "rejected": 0}
+
+    def acquire(self):
+        try:
+            warm = self._idle.get_nowait()
+            self.count("reused")
+        except queue.Empty:
+            warm = WarmSession()
+            self.count("created")
+        return warm
+
+    def release(self, warm, healthy=True):
+        """Put a session back; broken ones (or ones beyond the pool size) are closed."""
+        if healthy:
+            try:
+                self._idle.put_nowait(warm)
+                return
+            except queue.Full:
+                pass
+        self.count("discarded")
+        warm.close()
+
+    def count(self, key):
+        """Add one to a /stats counter; the HTTP engine counts form_loads / form_reuses / rejected here."""
+        with self._lock:
+            self.stats[key] += 1
+
+    def snapshot(self):
+        with self._lock:
+            data = dict(self.stats)
+        data["idle"] = self._idle.qsize()
+        return data
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_session_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SessionPool()
+        return _pool
@@ -1,6 +1,10 @@
-import re
 import time
-from playwright.sync_api import sync_playwright
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+from project.browser_pool import get_pool
+from project.config import CASE_STATUS_URL, TIMEOUTS
+from project.parser import LayoutChanged, parse_row_html
+from project.ratelimit import Overloaded, limiter_for, polite_call
+from project.timing import StepTimer, step
 
 def scrape_case_info(case_type, case_number, case_year, headless=False):
     """
@@ -13,93 +17,103 @@ def scrape_case_info(case_type, case_number, case_year, headless=False):
 
     Returns dict ya None agar case nahi mila.
     """
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=headless)
-        context = browser.new_context()
-        page = context.new_page()
-
+    timer = StepTimer("case_info", engine="playwright")
+    try:
+        result = get_pool(headless).run(
+            lambda page: _scrape_case_info(page, case_type, case_number, case_year, timer),
+            timer=timer
+        )
+        timer.finish("found" if result else "not_found")
+        return result
+    except Exception as e:
+        print("Error scraping case info:", e)
+        timer.finish("error")
+        return None
+
+
+def _scrape_case_info(page, case_type, case_number, case_year, timer=None):
+    """Form fill + result parsing on a page handed out by the browser pool."""
+    open_case_status(page, case_type, case_number, case_year, timer)
+    return parse_case_row(page, timer)
+
+
+def _is_search_response(response):
+    # The search answers on the same URL (XHR for the results table or a form POST)
+    return ("get-case-type-status" in response.url
+            and response.request.resource_type in ("xhr", "fetch", "document"))
+
+
+def polite_goto(page, url, timeout):
+    """page.goto under the court site's rate limiter, retried on timeouts / 5xx."""
+    def load():
+        response = page.goto(url, wait_until="domcontentloaded", timeout=timeout)
+        if response is not None and (response.status >= 500 or response.status == 429):
+            raise Overloaded(f"{response.status} from {url}")
+        return response
+
+    return polite_call(url, load, is_timeout=lambda e: isinstance(e, PlaywrightTimeoutError))
+
+
+def open_case_status(page, case_type, case_number, case_year, timer=None):
+    """Open the case status form, fill it, solve the captcha and submit."""
+    with step(timer, "navigate"):
+        polite_goto(page, CASE_STATUS_URL, TIMEOUTS.navigation)
+        page.wait_for_selector('#captcha-code', state='visible', timeout=TIMEOUTS.form_ready)
+
+    # Fill form inputs
+    with step(timer, "fill_form"):
+        page.select_option('select[name="case_type"]', case_type)
+        page.fill('input[name="case_number"]', case_number)
+        page.select_option('select[name="case_year"]', case_year)
+
+    # Captcha fill
+    with step(timer, "captcha"):
+        captcha_value = page.inner_text('#captcha-code').strip()
+        page.fill('#captchaInput', captcha_value)
+
+    # Submit and wait for the site to answer instead of sleeping
+    # (the submit counts against the court site's rate limit too)
+    with step(timer, "submit"):
+        limiter = limiter_for(CASE_STATUS_URL)
+        limiter.acquire()
+        started = time.monotonic()
         try:
-            page.goto("https://delhihighcourt.nic.in/app/get-case-type-status", timeout=60000)
-
-            # Fill form inputs
-            page.select_option('select[name="case_type"]', case_type)
-            page.fill('input[name="case_number"]', case_number)
-            page.select_option('select[name="case_year"]', case_year)
-
-            # Captcha fill
-            captcha_value = page.inner_text('#captcha-code').strip()
-            page.fill('#captchaInput', captcha_value)
-
-            # Submit
-            page.locator('#search').click()
-
-            # Wait for table to appear (case results)
-            # Table row selector: adjust if site changes
-            page.wait_for_selector('table tbody tr', timeout=8000)
-            time.sleep(1)  # small buffer
-
-            # Check if any row exists
-            rows = page.locator('table tbody tr')
-            if rows.count() == 0:
-                print("❌ No case row found.")
-                return None
-
-            first = rows.nth(0)
-            cells = first.locator('td')
-            if cells.count() < 4:
-                print("❌ Unexpected table structure.")
-                return None
-
-            # Cell 1: S.No (ignore)
-            # Cell 2: Diary No. / Case No. [STATUS]
-            case_cell = cells.nth(1).inner_text().strip()
-            # Extract case_no and status
-            # Example: "CRL.A. - 1207 / 2019\n[DISPOSED]"
-            case_no_match = re.search(r'([A-Za-z0-9\.\- ]+/\s*\d{4})', case_cell)
-            status_match = re.search(r'\[([^\]]+)\]', case_cell)
-            case_identifier = case_cell.split('\n')[0].strip()
-            status = status_match.group(1).strip() if status_match else None
-
-            # Cell 3: Petitioner Vs. Respondent
-            parties = cells.nth(2).inner_text().strip()
-
-            # Cell 4: Listing Date / Court No. block contains Next Date, Last Date, Court No
-            date_block = cells.nth(3).inner_text().strip()
-
-            # Parse dates using regex
-            next_hearing = None
-            last_hearing = None
-            court_no = None
-
-            # Example chunk: "NEXT DATE: NA\nLast Date: 23/01/2023\nCOURT NO:"
-            nd = re.search(r'NEXT DATE:\s*([^\n]+)', date_block, re.IGNORECASE)
-            if nd:
-                next_hearing = nd.group(1).strip()
-
-            ld = re.search(r'Last Date:\s*([^\n]+)', date_block, re.IGNORECASE)
-            if ld:
-                last_hearing = ld.group(1).strip()
-
-            cn = re.search(r'COURT NO:\s*([^\n]*)', date_block, re.IGNORECASE)
-            if cn:
-                court_no = cn.group(1).strip() or None  # might be empty
-
-            result = {
-                "case_identifier": case_identifier,
-                "status": status,
-                "parties": parties,
-                "next_hearing_date": next_hearing,
-                "last_hearing_date": last_hearing,
-                "court_no": court_no,
-            }
-
-            return result
-
-        except Exception as e:
-            print("Error scraping case info:", e)
-            return None
-        finally:
-            browser.close()
+            with page.expect_response(_is_search_response, timeout=TIMEOUTS.search_response) as response_info:
+                page.locator('#search').click()
+            status = response_info.value.status
+            limiter.record(time.monotonic() - started, "server_error" if status >= 500 else "ok")
+        except PlaywrightTimeoutError:
+            # No matching response seen; the results table wait below decides
+            limiter.record(outcome="timeout")
+            print("⚠️ No search response seen, waiting for the table instead.")
+
+
+def parse_case_row(page, timer=None):
+    """Wait for the results table and parse its first row (None if no case)."""
+    # Wait for table to appear (case results)
+    # Table row selector: adjust if site changes
+    with step(timer, "results_table"):
+        page.wait_for_selector('table tbody tr', state='attached', timeout=TIMEOUTS.results_table)
+
+    with step(timer, "parse"):
+        return _parse_first_row(page)
+
+
+def _parse_first_row(page):
+    # Check if any row exists
+    rows = page.locator('table tbody tr')
+    if rows.count() == 0:
+        print("❌ No case row found.")
+        return None
+
+    # Whole row in one round-trip, parsed locally by the shared parser
+    row_html = rows.first.evaluate("row => row.outerHTML")
+    try:
+        row = parse_row_html(row_html)
+    except LayoutChanged:
+        print("❌ Unexpected table structure.")
+        return None
+    return row.to_dict() if row else None
 
 # ---- Test run ----
 if __name__ == "__main__":
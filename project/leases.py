@@ -0,0 +1,149 @@
+import os
+import socket
+import threading
+import time
+import uuid
+from project.db import get_connection
+
+# Seconds a claim lasts unless renewed; a crashed worker's claims lapse after this
+LEASE_SECONDS = float(os.environ.get("LEASE_SECONDS", "180"))
+# How often a process waiting on someone else's claim looks again
+LEASE_POLL_SECONDS = float(os.environ.get("LEASE_POLL_SECONDS", "0.25"))
+
+_TOKEN = uuid.uuid4().hex[:8]
+
+
+def case_key(case_type, case_number, case_year):
+    return f"scrape:{case_type}|{case_number}|{case_year}"
+
+
+class LeaseTable:
+    """
+    Named, expiring claims in the shared SQLite database, so that of all the
+    processes using the file (gunicorn workers, other hosts on the same
+    volume) only one does a given piece of work at a time. Claims on
+    different names never block each other, so adding workers adds
+    throughput; only the short claim / release writes are serialized.
+
+    Taking a claim is one UPSERT that only wins when the name is free,
+    expired, or already ours (which renews it). Work that may outlive the
+    ttl uses `claim`: exclusive among this process's threads too, and
+    renewed in the background until released.
+    """
+
+    def __init__(self, db_path, ttl=LEASE_SECONDS):
+        self.db_path = db_path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._held = set()       # names claimed here, renewed by the renewer thread
+        self._renewer = None
+        self.stats = {"acquired": 0, "contended": 0, "renewed": 0, "lost": 0, "waits": 0, "wait_time": 0.0}
+
+    @property
+    def owner(self):
+        # Worked out on every call: forked workers share _TOKEN but not their pid
+        return f"{socket.gethostname()}:{os.getpid()}:{_TOKEN}"
+
+    def acquire(self, name, ttl=None):
+        """Claim (or renew) `name`; False when another live process holds it."""
+        now = time.time()
+        conn = get_connection(self.db_path)
+        cursor = conn.execute(
+            "INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+            "WHERE leases.expires_at < ? OR leases.owner = excluded.owner",
+            (name, self.owner, now + (ttl or self.ttl), now))
+        conn.commit()
+        won = cursor.rowcount == 1
+        self._count("acquired" if won else "contended")
+        return won
+
+    def claim(self, name):
+        """
+        Exclusive `acquire`: also False while another thread here holds
+        `name`. The claim is renewed every ttl / 3 until `release`.
+        """
+        with self._lock:
+            if name in self._held:
+                self.stats["contended"] += 1
+                return False
+            self._held.add(name)
+        if not self.acquire(name):
+            with self._lock:
+                self._held.discard(name)
+            return False
+        with self._lock:
+            if self._renewer is None:
+                self._renewer = threading.Thread(target=self._renew, name="lease-renewer", daemon=True)
+                self._renewer.start()
+        return True
+
+    def release(self, name):
+        with self._lock:
+            self._held.discard(name)
+        conn = get_connection(self.db_path)
+        conn.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, self.owner))
+        conn.commit()
+
+    def holds(self, name):
+        """True while this process has `name` from `claim` (and the renewer hasn't lost it)."""
+        with self._lock:
+            return name in self._held
+
+    def held(self, name):
+        """True while anyone (this process included) has an unexpired claim on `name`."""
+        row = get_connection(self.db_path).execute("SELECT expires_at FROM leases WHERE name = ?", (name,)).fetchone()
+        return row is not None and row[0] >= time.time()
+
+    def wait(self, name, timeout):
+        """Wait until nobody holds `name` (released or expired); False on timeout."""
+        conn = get_connection(self.db_path)
+        started = time.monotonic()
+        try:
+            while True:
+                row = conn.execute("SELECT expires_at FROM leases WHERE name = ?", (name,)).fetchone()
+                if row is None or row[0] < time.time():
+                    return True
+                if time.monotonic() - started >= timeout:
+                    return False
+                time.sleep(LEASE_POLL_SECONDS)
+        finally:
+            with self._lock:
+                self.stats["waits"] += 1
+                self.stats["wait_time"] += time.monotonic() - started
+
+    def snapshot(self):
+        row = get_connection(self.db_path).execute(
+            "SELECT COUNT(*), COALESCE(SUM(owner = ?), 0) FROM leases WHERE expires_at >= ?",
+            (self.owner, time.time())).fetchone()
+        with self._lock:
+            data = dict(self.stats)
+        data.update(held=row[0], held_here=row[1], owner=self.owner)
+        data["wait_time"] = round(data["wait_time"], 4)
+        return data
+
+    def _renew(self):
+        while True:
+            time.sleep(self.ttl / 3)
+            with self._lock:
+                names = list(self._held)
+            if not names:
+                continue
+            conn = get_connection(self.db_path)
+            expires_at = time.time() + self.ttl
+            for name in names:
+                cursor = conn.execute("UPDATE leases SET expires_at = ? WHERE name = ? AND owner = ?",
+                                      (expires_at, name, self.owner))
+                with self._lock:
+                    if cursor.rowcount == 1:
+                        self.stats["renewed"] += 1
+                    elif name in self._held:
+                        # Released meanwhile, or it lapsed and another process took it
+                        print(f"Lease {name} was lost before it could be renewed")
+                        self._held.discard(name)
+                        self.stats["lost"] += 1
+            conn.commit()
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
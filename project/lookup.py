@@ -0,0 +1,47 @@
+from project.browser_pool import get_pool
+from project.info_scraper import open_case_status, parse_case_row
+from project.scarp import collect_orders
+from project.timing import StepTimer
+
+
+def lookup_case(case_type, case_number, case_year, headless=True, raise_errors=False):
+    """
+    Single trip to the court site for one case:
+    search the case, parse the result row and follow the Orders link
+    in the same page session.
+
+    Returns the case info dict with extra `pdf_link` (latest order PDF) and
+    `orders` (every order as a dict) keys, or None if the case was not found
+    (or on errors, unless `raise_errors`).
+    """
+    timer = StepTimer("lookup", engine="playwright")
+    try:
+        case_info = get_pool(headless).run(
+            lambda page: _lookup_case(page, case_type, case_number, case_year, timer),
+            timer=timer
+        )
+        timer.finish("found" if case_info else "not_found")
+        return case_info
+    except Exception as e:
+        print("Error during case lookup:", e)
+        timer.finish("error")
+        if raise_errors:
+            raise
+        return None
+
+
+def _lookup_case(page, case_type, case_number, case_year, timer=None):
+    open_case_status(page, case_type, case_number, case_year, timer)
+    case_info = parse_case_row(page, timer)
+    if not case_info:
+        return None
+
+    # The orders are a bonus: a missing Orders page should not lose the case info
+    try:
+        orders = collect_orders(page, timer)
+    except Exception as e:
+        print(f"Orders lookup error: {e}")
+        orders = []
+    case_info['pdf_link'] = orders[-1].pdf_url if orders else None
+    case_info['orders'] = [order.to_dict() for order in orders]
+    return case_info
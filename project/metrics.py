@@ -0,0 +1,146 @@
+import os
+import json
+import random
+import threading
+
+# Latency buckets in seconds (court site steps range from ms to tens of seconds)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# Share of lookups written to the trace log (0 = off, 1 = every lookup)
+TRACE_SAMPLE_RATE = float(os.environ.get("TRACE_SAMPLE_RATE", "0"))
+TRACE_LOG = os.environ.get("TRACE_LOG", "traces.ndjson")
+
+_registry = []
+_trace_lock = threading.Lock()
+
+
+def _label_str(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with labels, rendered in the Prometheus text format."""
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name) or "none" for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_label_str(self.labels, key)} {_format(value)}" for key, value in items]
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels (Prometheus text format)."""
+
+    def __init__(self, name, help_text, labels=(), buckets=BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name) or "none" for name in self.labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.labels + ("le",)
+        for key, series in items:
+            for bound, count in zip(self.buckets, series):
+                lines.append(f"{self.name}_bucket{_label_str(names, key + (bound,))} {count}")
+            lines.append(f"{self.name}_bucket{_label_str(names, key + ('+Inf',))} {series[-1]}")
+            lines.append(f"{self.name}_sum{_label_str(self.labels, key)} {_format(series[-2])}")
+            lines.append(f"{self.name}_count{_label_str(self.labels, key)} {series[-1]}")
+        return lines
+
+
+def gauge(name, help_text, samples, labels=()):
+    """
+    Lines for a gauge read at scrape time from existing stats snapshots.
+    `samples` is a list of (label values, value).
+    """
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+    lines += [f"{name}{_label_str(labels, key)} {_format(value)}" for key, value in samples]
+    return lines
+
+
+LOOKUPS = Counter(
+    "court_lookups_total", "Lookups finished, by kind, engine and outcome.",
+    ("name", "engine", "outcome"))
+LOOKUP_SECONDS = Histogram(
+    "court_lookup_seconds", "Wall time of a whole lookup.",
+    ("name", "engine", "outcome"))
+STEP_SECONDS = Histogram(
+    "court_lookup_step_seconds", "Time spent in each phase of a lookup.",
+    ("name", "step", "engine", "outcome"))
+HTTP_REQUESTS = Counter(
+    "app_http_requests_total", "Requests answered by the Flask app.",
+    ("endpoint", "status"))
+HTTP_SECONDS = Histogram(
+    "app_http_request_seconds", "Time to answer a request (streamed bodies not included).",
+    ("endpoint",))
+
+
+def record_lookup(data):
+    """Feed one finished StepTimer (its as_dict()) into the metrics and the trace log."""
+    labels = {"name": data["name"], "engine": data.get("engine"), "outcome": data["outcome"]}
+    LOOKUPS.inc(**labels)
+    LOOKUP_SECONDS.observe(data["total"], **labels)
+    for step_name, seconds in data["steps"].items():
+        STEP_SECONDS.observe(seconds, step=step_name, **labels)
+
+    if TRACE_SAMPLE_RATE > 0 and random.random() < TRACE_SAMPLE_RATE:
+        _write_trace(data)
+
+
+def _write_trace(data):
+    try:
+        with _trace_lock, open(TRACE_LOG, "a", encoding="utf-8") as f:
+            f.write(json.dumps(data) + "\n")
+    except OSError as e:
+        print(f"Trace log error: {e}")
+
+
+def render(extra_lines=()):
+    """Everything in the registry plus `extra_lines` (gauges), as one text body."""
+    lines = []
+    for metric in list(_registry):
+        lines += metric.render()
+    lines += list(extra_lines)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,43 @@
+from project.cache_policy import now_iso
+
+COLUMNS = ("order_date", "pdf_url", "label", "first_seen")
+
+
+def store_orders(conn, case_type, case_number, case_year, orders):
+    """
+    Add the orders of a case we haven't stored yet and return them (the caller
+    commits). `orders` is the Orders page in page order, oldest upload first,
+    so only the tail after the last order we already have is new: walking
+    back from the end stops at the first known PDF, and a long-running case
+    with one new order costs one lookup and one insert.
+    """
+    if not orders:
+        return []
+    key = (case_type, case_number, case_year)
+    has_any = conn.execute(
+        "SELECT 1 FROM case_orders WHERE case_type = ? AND case_number = ? AND case_year = ? LIMIT 1", key).fetchone()
+
+    new = orders
+    if has_any:
+        start = len(orders)
+        while start > 0 and not conn.execute(
+                "SELECT 1 FROM case_orders WHERE case_type = ? AND case_number = ? AND case_year = ? AND pdf_url = ?",
+                key + (orders[start - 1]["pdf_url"],)).fetchone():
+            start -= 1
+        new = orders[start:]
+        if not new:
+            return []
+
+    seen = now_iso()
+    conn.executemany(
+        "INSERT OR IGNORE INTO case_orders (case_type, case_number, case_year, order_date, pdf_url, label, first_seen) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [key + (order["order_date"], order["pdf_url"], order["label"], seen) for order in new])
+    return new
+
+
+def fetch_orders(conn, case_type, case_number, case_year):
+    """Stored orders of a case, newest upload first."""
+    rows = conn.execute(
+        f"SELECT {', '.join(COLUMNS)} FROM case_orders WHERE case_type = ? AND case_number = ? AND case_year = ? ORDER BY rowid DESC",
+        (case_type, case_number, case_year))
+    return [dict(zip(COLUMNS, row)) for row in rows]
@@ -0,0 +1,193 @@
+import re
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Optional
+from urllib.parse import urljoin
+
+# Compiled once; the same patterns serve the HTTP and Playwright engines
+STATUS_RE = re.compile(r'\[([^\]]+)\]')
+NEXT_DATE_RE = re.compile(r'NEXT DATE:\s*([^\n]+)', re.IGNORECASE)
+LAST_DATE_RE = re.compile(r'Last Date:\s*([^\n]+)', re.IGNORECASE)
+COURT_NO_RE = re.compile(r'COURT NO:\s*([^\n]*)', re.IGNORECASE)
+NO_DATA_RE = re.compile(r'\bno\b', re.IGNORECASE)
+DATE_RE = re.compile(r'(\d{1,2})[/.-](\d{1,2})[/.-](\d{4})')
+ISO_DATE_RE = re.compile(r'(\d{4})-(\d{2})-(\d{2})')
+
+
+class LayoutChanged(Exception):
+    """
+    The page did not look like the server-rendered form/results we know how
+    to parse (JS-only page or a changed layout). A browser engine may still
+    be able to handle it.
+    """
+
+
+@dataclass
+class CaseRow:
+    """One row of the case status results table."""
+    case_identifier: str
+    status: Optional[str]
+    parties: str
+    next_hearing_date: Optional[date]
+    last_hearing_date: Optional[date]
+    court_no: Optional[str]
+    orders_link: Optional[str] = None
+
+    def to_dict(self):
+        """The case_info dict used by the app (dates as ISO strings)."""
+        return {
+            "case_identifier": self.case_identifier,
+            "status": self.status,
+            "parties": self.parties,
+            "next_hearing_date": self.next_hearing_date.isoformat() if self.next_hearing_date else None,
+            "last_hearing_date": self.last_hearing_date.isoformat() if self.last_hearing_date else None,
+            "court_no": self.court_no,
+        }
+
+
+@dataclass
+class Order:
+    """One order on a case's Orders page."""
+    order_date: Optional[date]
+    pdf_url: str
+    label: str
+
+    def to_dict(self):
+        return {
+            "order_date": self.order_date.isoformat() if self.order_date else None,
+            "pdf_url": self.pdf_url,
+            "label": self.label,
+        }
+
+
+def parse_date(text):
+    """'23/01/2023' (or 23-01-2023 / 2023-01-23) -> date; 'NA', blanks and junk -> None."""
+    if not text:
+        return None
+    match = DATE_RE.search(text)
+    try:
+        if match:
+            day, month, year = (int(part) for part in match.groups())
+            return date(year, month, day)
+        match = ISO_DATE_RE.search(text)
+        if match:
+            return datetime.strptime(match.group(0), "%Y-%m-%d").date()
+    except ValueError:
+        pass
+    return None
+
+
+def cell_text(cell):
+    """Text of a cell with one line per visual line, like Playwright's inner_text."""
+    lines = (line.strip() for line in cell.get_text("\n").split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+def parse_row(row):
+    """
+    Parse a results <tr> (BeautifulSoup tag).
+    Returns None for the "No data" row, raises LayoutChanged for anything
+    else that doesn't have the expected cells.
+    """
+    cells = row.find_all('td')
+    if len(cells) < 4:
+        if NO_DATA_RE.search(row.get_text()):
+            return None
+        raise LayoutChanged("Unexpected table structure")
+
+    # Cell 1: S.No (ignore)
+    # Cell 2: Diary No. / Case No. [STATUS], e.g. "CRL.A. - 1207 / 2019\n[DISPOSED]"
+    case_cell = cell_text(cells[1])
+    status_match = STATUS_RE.search(case_cell)
+
+    # Cell 3: Petitioner Vs. Respondent
+    parties = cell_text(cells[2])
+
+    # Cell 4: "NEXT DATE: NA\nLast Date: 23/01/2023\nCOURT NO:"
+    date_block = cell_text(cells[3])
+    nd = NEXT_DATE_RE.search(date_block)
+    ld = LAST_DATE_RE.search(date_block)
+    cn = COURT_NO_RE.search(date_block)
+
+    orders = next((a for a in row.find_all('a') if 'orders' in a.get_text().lower()), None)
+
+    return CaseRow(
+        case_identifier=case_cell.split('\n')[0].strip(),
+        status=status_match.group(1).strip() if status_match else None,
+        parties=parties,
+        next_hearing_date=parse_date(nd.group(1)) if nd else None,
+        last_hearing_date=parse_date(ld.group(1)) if ld else None,
+        court_no=(cn.group(1).strip() or None) if cn else None,  # might be empty
+        orders_link=orders.get('href') if orders else None,
+    )
+
+
+def _soup(html):
+    # bs4 is imported on the first parse, not when the app starts
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(html, 'html.parser')
+
+
+def parse_row_html(html):
+    """Parse the outerHTML of one results row (one round-trip from the browser)."""
+    row = _soup(html).find('tr')
+    if row is None:
+        raise LayoutChanged("No table row in the given HTML")
+    return parse_row(row)
+
+
+def parse_results_page(html):
+    """
+    First case on a server-rendered results page.
+    Returns None when the site says there is no such case.
+    """
+    soup = _soup(html)
+    table = soup.find('table')
+    if not table:
+        raise LayoutChanged("No results table found")
+
+    data_rows = [row for row in table.find_all('tr') if row.find('td')]
+    if not data_rows:
+        # Only a header: the rows are filled in by JavaScript
+        raise LayoutChanged("Results table has no server-rendered rows")
+    return parse_row(data_rows[0])
+
+
+def make_order(href, link_text, row_cells, base_url):
+    """
+    Order from one PDF link: its href, the link text and the texts of the
+    cells in its table row ("S.No. | Case No. | Date of Order | Order Type").
+    """
+    link_text = " ".join(link_text.split())
+    cells = [" ".join(cell.split()) for cell in row_cells]
+    order_date = parse_date(link_text)
+    if order_date is None:
+        order_date = next((d for d in map(parse_date, cells) if d), None)
+    # The order type sits after the cell holding the link; fall back to the link text
+    label = cells[-1] if cells and cells[-1] != link_text and not parse_date(cells[-1]) else link_text
+    return Order(order_date=order_date, pdf_url=urljoin(base_url, href), label=label)
+
+
+def orders_from_links(links, base_url):
+    """Orders from the browser's PDF links (scarp.ORDERS_JS: href, text, row cells each), in page order."""
+    return [make_order(link['href'], link['text'], link['cells'], base_url) for link in links if link['href']]
+
+
+def parse_orders_page(html, base_url):
+    """Every order on an Orders page (date, absolute PDF URL, label), in page order."""
+    soup = _soup(html)
+    pdf_links = soup.select('a[href*=".pdf"]')
+    if not pdf_links and soup.find('table') and not soup.find('td'):
+        # Orders table is filled in by JavaScript
+        raise LayoutChanged("Orders table has no server-rendered rows")
+    orders = []
+    for a in pdf_links:
+        row = a.find_parent('tr')
+        cells = [cell.get_text(" ") for cell in row.find_all('td')] if row else []
+        orders.append(make_order(a['href'], a.get_text(" "), cells, base_url))
+    return orders
+
+
+def parse_order_pdf_links(html, base_url):
+    """Absolute URLs of every order PDF on an Orders page, in page order."""
+    return [order.pdf_url for order in parse_orders_page(html, base_url)]
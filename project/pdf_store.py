@@ -0,0 +1,185 @@
+import os
+import re
+import time
+import hashlib
+import threading
+from project.db import get_connection
+from project.ratelimit import Overloaded, polite_call
+from project.singleflight import SingleFlight
+from project.timing import StepTimer, step
+
+# Download order PDFs and serve them ourselves (off by default)
+PDF_DOWNLOAD = os.environ.get("PDF_DOWNLOAD", "0") == "1"
+PDF_STORE_DIR = os.environ.get("PDF_STORE_DIR", "pdf_store")
+# Total size of the store; least recently served files go first
+PDF_STORE_MAX_MB = int(os.environ.get("PDF_STORE_MAX_MB", "500"))
+# Larger files are not stored (protects the disk from odd responses)
+PDF_MAX_FILE_MB = int(os.environ.get("PDF_MAX_FILE_MB", "50"))
+# Connections kept open to the court site for downloads
+PDF_POOL_SIZE = int(os.environ.get("PDF_POOL_SIZE", "4"))
+CHUNK_SIZE = 64 * 1024
+
+SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def download_session():
+    """Shared keep-alive session for PDF downloads (urllib3 pools the connections)."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=PDF_POOL_SIZE, pool_maxsize=PDF_POOL_SIZE)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+        return _session
+
+
+class PdfStore:
+    """
+    Order PDFs on disk, named by the sha256 of their content, so the same
+    order reached through different URLs is stored once. The pdf_files /
+    pdf_urls tables map court URLs to hashes and track when each file was
+    last served; the store is trimmed to `max_bytes` least recently used first.
+    """
+
+    def __init__(self, db_path, root=PDF_STORE_DIR, max_bytes=PDF_STORE_MAX_MB * 1024 * 1024):
+        self.db_path = db_path
+        self.root = root
+        self.max_bytes = max_bytes
+        self._flights = SingleFlight()  # one download per URL at a time
+        self._lock = threading.Lock()
+        self.stats = {"downloads": 0, "dedup": 0, "hits": 0, "evictions": 0, "failed": 0, "bytes_downloaded": 0}
+
+    def lookup(self, url):
+        """sha256 of an already stored URL, or None."""
+        row = get_connection(self.db_path).execute(
+            "SELECT sha256 FROM pdf_urls WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else None
+
+    def fetch(self, url):
+        """sha256 of the PDF at `url`, downloading it if it isn't stored yet."""
+        sha256 = self.lookup(url)
+        if sha256 and os.path.exists(self.path(sha256)):
+            self._count("hits")
+            return sha256
+        sha256, _ = self._flights.do(url, lambda: self._download(url))
+        return sha256
+
+    def path(self, sha256):
+        return os.path.join(self.root, sha256[:2], sha256 + ".pdf")
+
+    def open(self, sha256):
+        """Path of a stored file (marked as just used), or None."""
+        if not SHA256_RE.match(sha256 or ""):
+            return None
+        conn = get_connection(self.db_path)
+        path = self.path(sha256)
+        if not os.path.exists(path):
+            return None
+        # Only write when the LRU position would actually move
+        now = time.time()
+        conn.execute("UPDATE pdf_files SET last_used = ? WHERE sha256 = ? AND last_used < ?", (now, sha256, now - 60))
+        conn.commit()
+        return path
+
+    def snapshot(self):
+        row = get_connection(self.db_path).execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pdf_files").fetchone()
+        with self._lock:
+            data = dict(self.stats)
+        data.update(files=row[0], bytes=row[1], max_bytes=self.max_bytes)
+        return data
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def _download(self, url):
+        tmp_dir = os.path.join(self.root, "tmp")
+        os.makedirs(tmp_dir, exist_ok=True)
+        tmp_path = os.path.join(tmp_dir, f"{threading.get_ident()}-{time.time_ns()}.part")
+        timer = StepTimer("pdf_download", engine="http")
+        try:
+            with step(timer, "download"):
+                sha256, size = self._stream_to(url, tmp_path)
+            with step(timer, "store"):
+                self._add(url, sha256, size, tmp_path)
+        except Exception:
+            self._count("failed")
+            timer.finish("error")
+            raise
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        timer.finish("found")
+        return sha256
+
+    def _stream_to(self, url, tmp_path):
+        """Write the body to `tmp_path` chunk by chunk, hashing as it goes."""
+        import requests
+        def open_response():
+            # Only the request + headers count against the rate limit / retries
+            response = download_session().get(url, stream=True, timeout=30)
+            if response.status_code >= 500 or response.status_code == 429:
+                response.close()
+                raise Overloaded(f"{response.status_code} from {url}")
+            response.raise_for_status()
+            return response
+
+        response = polite_call(url, open_response,
+                               is_timeout=lambda e: isinstance(e, (requests.Timeout, requests.ConnectionError)))
+        digest = hashlib.sha256()
+        size = 0
+        limit = PDF_MAX_FILE_MB * 1024 * 1024
+        with response, open(tmp_path, "wb") as f:
+            for chunk in response.iter_content(CHUNK_SIZE):
+                if size == 0 and not chunk.startswith(b"%PDF"):
+                    raise ValueError(f"Not a PDF: {url}")
+                size += len(chunk)
+                if size > limit:
+                    raise ValueError(f"PDF larger than {PDF_MAX_FILE_MB} MB: {url}")
+                digest.update(chunk)
+                f.write(chunk)
+        if size == 0:
+            raise ValueError(f"Empty response: {url}")
+        self._count("downloads")
+        self._count("bytes_downloaded", size)
+        return digest.hexdigest(), size
+
+    def _add(self, url, sha256, size, tmp_path):
+        final = self.path(sha256)
+        conn = get_connection(self.db_path)
+        with self._lock:
+            if os.path.exists(final):
+                self.stats["dedup"] += 1
+            else:
+                os.makedirs(os.path.dirname(final), exist_ok=True)
+                os.replace(tmp_path, final)
+            conn.execute("INSERT OR IGNORE INTO pdf_files (sha256, size, last_used) VALUES (?, ?, ?)", (sha256, size, time.time()))
+            conn.execute("UPDATE pdf_files SET last_used = ? WHERE sha256 = ?", (time.time(), sha256))
+            conn.execute("INSERT OR REPLACE INTO pdf_urls (url, sha256) VALUES (?, ?)", (url, sha256))
+            conn.commit()
+            self._evict(conn, keep=sha256)
+
+    def _evict(self, conn, keep):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM pdf_files").fetchone()[0]
+        while total > self.max_bytes:
+            victims = conn.execute("SELECT sha256, size FROM pdf_files WHERE sha256 != ? ORDER BY last_used LIMIT 50", (keep,)).fetchall()
+            if not victims:
+                break
+            for sha256, size in victims:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(self.path(sha256))
+                except FileNotFoundError:
+                    pass
+                conn.execute("DELETE FROM pdf_urls WHERE sha256 = ?", (sha256,))
+                conn.execute("DELETE FROM pdf_files WHERE sha256 = ?", (sha256,))
+                total -= size
+                self.stats["evictions"] += 1
+            conn.commit()
@@ -0,0 +1,178 @@
+import os
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+# Starting / bounds for requests per second to one host
+RATE_START = float(os.environ.get("COURT_RATE_START", "2.0"))
+RATE_MIN = float(os.environ.get("COURT_RATE_MIN", "0.2"))
+RATE_MAX = float(os.environ.get("COURT_RATE_MAX", "10.0"))
+# Responses slower than this (seconds) count as the site struggling
+SLOW_RESPONSE = float(os.environ.get("COURT_SLOW_RESPONSE", "8.0"))
+# Retries for timeouts / 5xx, with jittered exponential backoff
+# (attempts in total, so at least 1: 0 would never send the request)
+RETRY_ATTEMPTS = max(1, int(os.environ.get("COURT_RETRY_ATTEMPTS", "3")))
+RETRY_BASE_DELAY = float(os.environ.get("COURT_RETRY_BASE_DELAY", "1.0"))
+RETRY_MAX_DELAY = float(os.environ.get("COURT_RETRY_MAX_DELAY", "30.0"))
+
+
+class Overloaded(Exception):
+    """The site answered with a 5xx or 429; worth retrying later."""
+
+
+class AdaptiveLimiter:
+    """
+    Token bucket for one host whose rate adapts AIMD-style:
+    every good response adds a little to the rate, a timeout / 5xx /
+    very slow response halves it.
+    """
+
+    def __init__(self, rate=RATE_START, min_rate=RATE_MIN, max_rate=RATE_MAX, burst=2):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "ok": 0, "slow": 0, "timeouts": 0, "server_errors": 0, "throttled_time": 0.0}
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        waited = 0.0
+        while True:
+            delay = self._take(waited)
+            if delay is None:
+                return waited
+            time.sleep(delay)
+            waited += delay
+
+    async def acquire_async(self):
+        """acquire() for coroutines: waits on the event loop instead of blocking it."""
+        import asyncio
+        waited = 0.0
+        while True:
+            delay = self._take(waited)
+            if delay is None:
+                return waited
+            await asyncio.sleep(delay)
+            waited += delay
+
+    def _take(self, waited):
+        # Take a token (None) or say how long until the next one is due
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                self.stats["requests"] += 1
+                self.stats["throttled_time"] += waited
+                return None
+            return (1 - self._tokens) / self.rate
+
+    def record(self, latency=None, outcome="ok"):
+        """
+        Feed back how the request went: outcome is "ok", "timeout" or
+        "server_error"; an "ok" slower than SLOW_RESPONSE counts as slow.
+        """
+        with self._lock:
+            if outcome == "ok" and latency is not None and latency > SLOW_RESPONSE:
+                outcome = "slow"
+            if outcome == "ok":
+                self.stats["ok"] += 1
+                # Additive increase: about +1 req/s after `rate` good responses
+                self.rate = min(self.max_rate, self.rate + 1.0 / max(self.rate, 1.0))
+            else:
+                key = {"slow": "slow", "timeout": "timeouts"}.get(outcome, "server_errors")
+                self.stats[key] += 1
+                # Multiplicative decrease
+                self.rate = max(self.min_rate, self.rate / 2)
+
+    def snapshot(self):
+        with self._lock:
+            data = dict(self.stats)
+            data["rate"] = round(self.rate, 3)
+        data["throttled_time"] = round(data["throttled_time"], 3)
+        return data
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def limiter_for(url):
+    host = urlparse(url).netloc or url
+    with _limiters_lock:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            limiter = _limiters[host] = AdaptiveLimiter()
+        return limiter
+
+
+def limiter_stats():
+    with _limiters_lock:
+        items = list(_limiters.items())
+    return {host: limiter.snapshot() for host, limiter in items}
+
+
+def backoff_delay(attempt):
+    """Full-jitter exponential backoff for retry number `attempt` (1-based)."""
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (attempt - 1)))
+
+
+def polite_call(url, fn, is_timeout=lambda e: False):
+    """
+    Run one request `fn()` to `url` under the host's limiter, feeding the
+    outcome back. Timeouts and Overloaded are retried with jittered
+    exponential backoff (RETRY_ATTEMPTS in total); other errors are raised.
+    """
+    limiter = limiter_for(url)
+    for attempt in range(1, RETRY_ATTEMPTS + 1):
+        limiter.acquire()
+        started = time.monotonic()
+        try:
+            result = fn()
+        except Exception as e:
+            delay = _retry_delay(limiter, url, attempt, e, is_timeout)
+        else:
+            limiter.record(time.monotonic() - started)
+            return result
+        time.sleep(delay)
+
+
+async def polite_call_async(url, fn, is_timeout=lambda e: False):
+    """polite_call for coroutines: `await fn()` is the request, the limiter and backoff waits don't block the loop."""
+    import asyncio
+    limiter = limiter_for(url)
+    for attempt in range(1, RETRY_ATTEMPTS + 1):
+        await limiter.acquire_async()
+        started = time.monotonic()
+        try:
+            result = await fn()
+        except Exception as e:
+            delay = _retry_delay(limiter, url, attempt, e, is_timeout)
+        else:
+            limiter.record(time.monotonic() - started)
+            return result
+        await asyncio.sleep(delay)
+
+
+def _retry_delay(limiter, url, attempt, error, is_timeout):
+    """
+    Feed a failed attempt back to the limiter and return the backoff before
+    the next one. Re-raises `error` when it isn't a timeout / Overloaded or
+    this was the last attempt.
+    """
+    if isinstance(error, Overloaded):
+        limiter.record(outcome="server_error")
+    elif is_timeout(error):
+        limiter.record(outcome="timeout")
+    else:
+        raise error
+    if attempt == RETRY_ATTEMPTS:
+        raise error
+    delay = backoff_delay(attempt)
+    print(f"Court site busy, retrying {url} in {delay:.1f}s (attempt {attempt + 1}/{RETRY_ATTEMPTS})")
+    return delay
@@ -1,6 +1,11 @@
-import time
 import requests
-from playwright.sync_api import sync_playwright
+from urllib.parse import urljoin
+from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
+from project.browser_pool import get_pool
+from project.config import CASE_STATUS_URL, TIMEOUTS
+from project.info_scraper import open_case_status, polite_goto
+from project.parser import orders_from_links
+from project.timing import StepTimer, step
 
 def fetch_case_and_download_pdf(case_type, case_number, case_year):
     with sync_playwright() as p:
@@ -8,7 +13,7 @@ def fetch_case_and_download_pdf(case_type, case_number, case_year):
         context = browser.new_context()
         page = context.new_page()
 
-        page.goto("https://delhihighcourt.nic.in/app/get-case-type-status")
+        page.goto(CASE_STATUS_URL, wait_until="domcontentloaded", timeout=TIMEOUTS.navigation)
         print("✅ Page opened")
 
         # Form fill
@@ -21,7 +26,7 @@ def fetch_case_and_download_pdf(case_type, case_number, case_year):
         page.fill('#captchaInput', captcha_value)
         page.click('#search')
 
-        time.sleep(3)
+        page.wait_for_selector('table tbody tr', state='attached', timeout=TIMEOUTS.results_table)
 
         # ✅ Click on "Orders" link
         orders_link = page.get_attribute('a:has-text("Orders")', 'href')
@@ -31,11 +36,10 @@ def fetch_case_and_download_pdf(case_type, case_number, case_year):
             return
 
         print(f"📄 Orders page: {orders_link}")
-        page.goto(orders_link)
-        time.sleep(3)
+        page.goto(orders_link, wait_until="domcontentloaded", timeout=TIMEOUTS.orders_page)
 
         # ✅ Get all PDF links (they are <a href="...pdf">)
-        page.wait_for_selector('a[href*=".pdf"]')  # ⏳ wait until PDF links load
+        page.wait_for_selector('a[href*=".pdf"]', state='attached', timeout=TIMEOUTS.orders_links)  # ⏳ wait until PDF links load
         pdf_links = page.locator('//a[contains(@href, ".pdf")]')
         count = pdf_links.count()
 
@@ -51,64 +55,79 @@ def fetch_case_and_download_pdf(case_type, case_number, case_year):
         browser.close()
         return full_pdf_url
 
-    # ✅ Download PDF using requests
-        # r = requests.get(full_pdf_url)
-        # filename = f"order_{case_number}_{case_year}.pdf"
-        # with open(filename, 'wb') as f:
-        #     f.write(r.content)
-
-        # print(f"📥 PDF downloaded as: {filename}")
-        # browser.close()
+    # 📥 Downloads: project/pdf_store.py streams PDFs into a local store (PDF_DOWNLOAD=1)
 
 def get_pdf_url(case_type, case_number, case_year):
     """
     Get PDF URL for a case without downloading
     """
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context()
-        page = context.new_page()
-
-        try:
-            page.goto("https://delhihighcourt.nic.in/app/get-case-type-status")
-
-            # Fill form inputs
-            page.select_option('select[name="case_type"]', case_type)
-            page.fill('input[name="case_number"]', case_number)
-            page.select_option('select[name="case_year"]', case_year)
-
-            # Captcha fill
-            captcha_value = page.inner_text('#captcha-code').strip()
-            page.fill('#captchaInput', captcha_value)
-            page.click('#search')
-
-            time.sleep(3)
-
-            # Click on "Orders" link
-            orders_link = page.get_attribute('a:has-text("Orders")', 'href')
-            if not orders_link:
-                browser.close()
-                return None
-
-            page.goto(orders_link)
-            time.sleep(3)
-
-            # Get all PDF links
-            page.wait_for_selector('a[href*=".pdf"]')
-            pdf_links = page.locator('//a[contains(@href, ".pdf")]')
-            count = pdf_links.count()
+    timer = StepTimer("pdf_url", engine="playwright")
+    try:
+        pdf_url = get_pool(headless=True).run(
+            lambda page: _get_pdf_url(page, case_type, case_number, case_year, timer),
+            timer=timer
+        )
+        timer.finish("found" if pdf_url else "not_found")
+        return pdf_url
+    except Exception as e:
+        timer.finish("error")
+        return None
+
+
+def _get_pdf_url(page, case_type, case_number, case_year, timer=None):
+    """Search the case and pick the latest order PDF on a pooled page."""
+    open_case_status(page, case_type, case_number, case_year, timer)
+    with step(timer, "results_table"):
+        page.wait_for_selector('table tbody tr', state='attached', timeout=TIMEOUTS.results_table)
+
+    return find_latest_order_pdf(page, timer)
+
+
+# Every PDF link with its row cells, collected in a single round-trip to the browser
+ORDERS_JS = """
+links => links.map(a => ({
+    href: a.getAttribute('href'),
+    text: a.innerText,
+    cells: a.closest('tr') ? Array.from(a.closest('tr').cells, cell => cell.innerText) : []
+}))
+"""
+
+
+def find_latest_order_pdf(page, timer=None):
+    """
+    Follow the "Orders" link of a case that is already shown in the results
+    table and return the URL of the latest order PDF (None if there is none).
+    """
+    orders = collect_orders(page, timer)
+    return orders[-1].pdf_url if orders else None
 
-            if count == 0:
-                browser.close()
-                return None
 
-            latest_pdf_url = pdf_links.nth(count - 1).get_attribute('href')
-            browser.close()
-            return latest_pdf_url
+def collect_orders(page, timer=None):
+    """
+    Follow the "Orders" link of the case shown in the results table and
+    return all its orders (date, PDF URL, label) in page order.
+    """
+    orders = page.locator('a:has-text("Orders")')
+    if orders.count() == 0:
+        return []
+    orders_link = orders.first.get_attribute('href')
+    if not orders_link:
+        return []
+    orders_link = urljoin(page.url, orders_link)
+
+    with step(timer, "orders_navigate"):
+        polite_goto(page, orders_link, TIMEOUTS.orders_page)
+
+    # Wait until PDF links are attached (the orders table may load after the page)
+    with step(timer, "orders_links"):
+        try:
+            page.wait_for_selector('a[href*=".pdf"]', state='attached', timeout=TIMEOUTS.orders_links)
+        except PlaywrightTimeoutError:
+            return []
 
-        except Exception as e:
-            browser.close()
-            return None
+    with step(timer, "orders_parse"):
+        links = page.eval_on_selector_all('a[href*=".pdf"]', ORDERS_JS)
+        return orders_from_links(links, page.url)
 
 # 🧪 Run test
 # fetch_case_and_download_pdf(case_type="CRL.A.", case_number="1207", case_year="2019")
@@ -0,0 +1,57 @@
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key: the first caller runs the
+    function, everyone who arrives while it is running waits and gets the
+    same result (or exception).
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.stats = {"runs": 0, "saved": 0}
+
+    def do(self, key, fn):
+        """Returns (result, shared) where `shared` is True for waiters."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.stats["saved"] += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.stats["runs"] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+            return call.result, False
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def snapshot(self):
+        with self._lock:
+            data = dict(self.stats)
+            data["in_flight"] = len(self._calls)
+        return data
@@ -0,0 +1,72 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Warm up before reporting ready: scraper modules, browser pool, case catalog
+PREWARM = os.environ.get("PREWARM", "0") == "1"
+
+
+class Startup:
+    """
+    Start-up progress of this process for /healthz and /readyz. Ready once
+    the schema is migrated and, with PREWARM=1, the warm-up steps have run.
+    A failed warm-up step is reported but doesn't keep the process out of
+    rotation (the lookup just pays for it later, as without PREWARM).
+    """
+
+    def __init__(self):
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+        self.state = "starting"   # starting / warming / ready
+        self.steps = {}           # step -> seconds
+        self.errors = {}
+        self.ready_after = None
+
+    @contextmanager
+    def step(self, name):
+        t0 = time.monotonic()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.steps[name] = round(time.monotonic() - t0, 4)
+
+    def mark_ready(self):
+        with self._lock:
+            self.state = "ready"
+            self.ready_after = round(time.monotonic() - self._started, 4)
+        print(f"✅ Ready after {self.ready_after:.2f}s")
+
+    def prewarm(self, steps):
+        """Run (name, fn) warm-up steps on a background thread, then mark the process ready."""
+        with self._lock:
+            self.state = "warming"
+
+        def run():
+            for name, fn in steps:
+                try:
+                    with self.step(name):
+                        fn()
+                except Exception as e:
+                    print(f"Pre-warm step {name} failed: {e}")
+                    with self._lock:
+                        self.errors[name] = str(e)
+            self.mark_ready()
+
+        threading.Thread(target=run, name="prewarm", daemon=True).start()
+
+    @property
+    def ready(self):
+        return self.state == "ready"
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "ready": self.state == "ready",
+                "uptime": round(time.monotonic() - self._started, 3),
+                "ready_after": self.ready_after,
+                "steps": dict(self.steps),
+                "errors": dict(self.errors),
+            }
@@ -0,0 +1,90 @@
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from project.metrics import record_lookup
+
+# Most recent lookup timings, newest last
+recent_timings = deque(maxlen=200)
+_lock = threading.Lock()
+
+
+class StepTimer:
+    """Records how long each step of one lookup took (tagged with the engine used)."""
+
+    def __init__(self, name, engine=None):
+        self.name = name
+        self.engine = engine
+        self.steps = []
+        self.outcome = None
+        self._started = time.perf_counter()
+        self._started_at = time.time()
+
+    @contextmanager
+    def step(self, step_name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps.append((step_name, time.perf_counter() - t0))
+
+    def add(self, step_name, seconds):
+        """Record a step that was timed elsewhere (e.g. waiting in a queue)."""
+        self.steps.append((step_name, seconds))
+
+    def total(self):
+        return time.perf_counter() - self._started
+
+    def as_dict(self):
+        # A step can run more than once (a retried form submit, two lease waits): add them up
+        steps = {}
+        for name, seconds in self.steps:
+            steps[name] = steps.get(name, 0.0) + seconds
+        return {
+            "name": self.name,
+            "engine": self.engine,
+            "outcome": self.outcome,
+            "started_at": round(self._started_at, 3),
+            "total": round(self.total(), 4),
+            "steps": {name: round(seconds, 4) for name, seconds in steps.items()},
+        }
+
+    def finish(self, outcome):
+        """Mark the lookup as done and keep its timings for /stats and /metrics."""
+        self.outcome = outcome
+        data = self.as_dict()
+        with _lock:
+            recent_timings.append(data)
+        record_lookup(data)
+        steps = ", ".join(f"{k}={v:.2f}s" for k, v in data["steps"].items())
+        print(f"⏱️ {self.name} [{self.engine or '-'}/{outcome}] {data['total']:.2f}s ({steps})")
+        return data
+
+
+def step(timer, step_name):
+    """`timer.step(...)` that also works when no timer was passed."""
+    return timer.step(step_name) if timer is not None else nullcontext()
+
+
+def recent(limit=20):
+    """The last `limit` lookup timings, newest last."""
+    with _lock:
+        return list(recent_timings)[-limit:]
+
+
+def step_summary():
+    """Average / max seconds per step over the recent lookups."""
+    with _lock:
+        items = list(recent_timings)
+    totals = {}
+    for item in items:
+        for name, seconds in item["steps"].items():
+            totals.setdefault(name, []).append(seconds)
+    return {
+        name: {
+            "count": len(values),
+            "avg": round(sum(values) / len(values), 4),
+            "max": round(max(values), 4),
+        }
+        for name, values in totals.items()
+    }
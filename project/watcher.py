@@ -0,0 +1,361 @@
+import os
+import json
+import heapq
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from project.cache_policy import classify, now_iso
+from project.db import get_connection
+from project.history import record_case, record_status
+from project.leases import LEASE_SECONDS, case_key
+from project.orders import store_orders
+from project.parser import parse_date
+
+# Watch-list scheduler settings (override with environment variables)
+WATCH_ENABLED = os.environ.get("WATCH_ENABLED", "1") == "1"
+# Watched cases checked per minute at most (on top of the court rate limiter)
+WATCH_PER_MINUTE = float(os.environ.get("WATCH_PER_MINUTE", "20"))
+# Check this long before a hearing (listing / court number changes)...
+WATCH_LEAD_HOURS = float(os.environ.get("WATCH_LEAD_HOURS", "24"))
+# ...and this long after the hearing date starts (outcome and orders are up by then)
+WATCH_AFTER_HOURS = float(os.environ.get("WATCH_AFTER_HOURS", "30"))
+# After a hearing that hasn't shown up on the site yet, look again this often
+WATCH_RECHECK_HOURS = float(os.environ.get("WATCH_RECHECK_HOURS", "24"))
+# Pending cases without a next date, "Not Found" cases
+WATCH_IDLE_DAYS = float(os.environ.get("WATCH_IDLE_DAYS", "7"))
+WATCH_DISPOSED_DAYS = float(os.environ.get("WATCH_DISPOSED_DAYS", "30"))
+# Random delay added to every check so cases sharing a hearing date don't all wake at once
+WATCH_SPREAD_SECONDS = float(os.environ.get("WATCH_SPREAD_SECONDS", "3600"))
+
+# What a watched case is compared on (history column, case_info key)
+TRACKED_FIELDS = (
+    ("status", "status"),
+    ("next_date", "next_hearing_date"),
+    ("last_date", "last_hearing_date"),
+    ("court_no", "court_no"),
+)
+
+
+def _timestamp(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def _hearing_timestamp(value):
+    day = parse_date(value)
+    if day is None:
+        return None
+    return datetime(day.year, day.month, day.day, tzinfo=timezone.utc).timestamp()
+
+
+def next_check(status, next_date, looked_at):
+    """
+    When a case last seen at `looked_at` (epoch seconds) should be scraped
+    again, from its stored status and next hearing date:
+      - disposed: rarely (WATCH_DISPOSED_DAYS)
+      - hearing ahead: WATCH_LEAD_HOURS before it, then WATCH_AFTER_HOURS after it starts
+      - hearing passed but not reflected yet: every WATCH_RECHECK_HOURS
+      - no hearing date / not found: every WATCH_IDLE_DAYS
+    """
+    kind = classify(status)
+    if kind == "disposed":
+        return looked_at + WATCH_DISPOSED_DAYS * 86400
+    hearing = _hearing_timestamp(next_date) if kind == "pending" else None
+    if hearing is None:
+        return looked_at + WATCH_IDLE_DAYS * 86400
+    for moment in (hearing - WATCH_LEAD_HOURS * 3600, hearing + WATCH_AFTER_HOURS * 3600):
+        if moment > looked_at:
+            return moment
+    return looked_at + WATCH_RECHECK_HOURS * 3600
+
+
+class Watcher:
+    """
+    Re-scrapes the cases on the watch list when a hearing is coming up or has
+    probably happened. Schedules live in memory (rebuilt from case_history
+    at start), so a check that finds nothing new writes nothing. A change in
+    status, dates or court number adds a history row and a case_changes row,
+    which are the events served on /watch/events.
+
+    `lookup_fn(case_type, case_number, case_year)` returns (case_info, engine)
+    like EngineRouter.lookup. `run_fn(job, on_skip)` runs a check (lookup
+    and writes) and returns when it is done, e.g. on the scrape executor;
+    `on_skip()` must be called instead if the job never runs.
+
+    With `leases` (a LeaseTable) only the process holding the "watcher"
+    claim (renewed in the background, so a long check can't outlast it) runs checks; it picks up cases added through the other processes
+    from watch_list, and another process takes over if it dies. A check
+    also holds the case's scrape lease until its job ends, like /scrape
+    does, so the two never scrape the same case at once.
+    """
+
+    def __init__(self, db_path, lookup_fn, per_minute=WATCH_PER_MINUTE, leases=None, run_fn=None):
+        self.db_path = db_path
+        self.lookup_fn = lookup_fn
+        self.run_fn = run_fn or (lambda job, on_skip: job())
+        self.leases = leases
+        self._leader = leases is None
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._heap = []          # (due, hearing, case) - stale entries are skipped
+        self._due = {}           # case -> due time of its live heap entry
+        self._hearing = {}       # case -> next hearing timestamp (priority among due cases)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._events = threading.Condition()
+        self._thread = None
+        self._stopped = False
+        self.stats = {"checks": 0, "unchanged": 0, "changed": 0, "errors": 0}
+
+
+    def add(self, cases):
+        """Watch `cases` (tuples); returns how many were new."""
+        conn = get_connection(self.db_path)
+        before = conn.total_changes
+        conn.executemany("INSERT OR IGNORE INTO watch_list (case_type, case_number, case_year, added_at) VALUES (?, ?, ?, ?)",
+                         [case + (now_iso(),) for case in cases])
+        conn.commit()
+        added = conn.total_changes - before
+        for case in cases:
+            self._schedule_from_history(conn, case)
+        self._wake.set()
+        return added
+
+    def remove(self, cases):
+        conn = get_connection(self.db_path)
+        before = conn.total_changes
+        conn.executemany("DELETE FROM watch_list WHERE case_type = ? AND case_number = ? AND case_year = ?", cases)
+        conn.commit()
+        with self._lock:
+            for case in cases:
+                self._due.pop(case, None)
+                self._hearing.pop(case, None)
+        return conn.total_changes - before
+
+    def schedule(self):
+        """Watched cases with their next check time, soonest first."""
+        with self._lock:
+            items = sorted(self._due.items(), key=lambda item: item[1])
+        return [
+            {"case_type": case[0], "case_number": case[1], "case_year": case[2],
+             "next_check": datetime.fromtimestamp(due, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")}
+            for case, due in items
+        ]
+
+
+    def events(self, since=0, limit=500):
+        """Recorded changes with id > `since`, oldest first."""
+        rows = get_connection(self.db_path).execute(
+            "SELECT id, case_type, case_number, case_year, changed_at, changes FROM case_changes WHERE id > ? ORDER BY id LIMIT ?",
+            (since, limit)).fetchall()
+        return [
+            {"id": row[0], "case_type": row[1], "case_number": row[2], "case_year": row[3],
+             "changed_at": row[4], "changes": json.loads(row[5])}
+            for row in rows
+        ]
+
+    def iter_events(self, since=0, timeout=30):
+        """Yield events as they are recorded; stops after `timeout` seconds without one."""
+        while True:
+            batch = self.events(since)
+            for event in batch:
+                yield event
+                since = event["id"]
+            if batch:
+                continue
+            with self._events:
+                notified = self._events.wait(timeout)
+            if not notified:
+                yield from self.events(since)
+                return
+
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="case-watcher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped = True
+        self._wake.set()
+
+    def snapshot(self):
+        with self._lock:
+            data = dict(self.stats)
+            data["watched"] = len(self._due)
+            data["next_due"] = round(max(0.0, self._heap[0][0] - time.time()), 1) if self._heap else None
+        data["running"] = self._thread is not None
+        data["leader"] = self._leader
+        return data
+
+    def _run(self):
+        conn = get_connection(self.db_path)
+        self._sync_watch_list(conn)
+        print(f"👀 Watching {len(self._due)} cases")
+        # Without leases nothing else can take over; with them, look at the watcher claim now and then
+        max_sleep = 3600 if self.leases is None else LEASE_SECONDS / 3
+
+        while not self._stopped:
+            if not self._lead(conn):
+                self._wake.wait(max_sleep)
+                self._wake.clear()
+                continue
+            due = self._pop_due()
+            if not due:
+                with self._lock:
+                    wait = self._heap[0][0] - time.time() if self._heap else 3600
+                self._wake.wait(max(1.0, min(wait, max_sleep)))
+                self._wake.clear()
+                if self.leases is not None:
+                    self._sync_watch_list(conn)  # cases added / removed by other processes
+                continue
+            for case in due:
+                if self._stopped or not self._lead(conn):
+                    break
+                self._check(case)
+                # Spread the checks out instead of hitting the site in a burst
+                time.sleep(self.interval)
+
+    def _lead(self, conn):
+        """True while this process runs the checks (takes / renews the watcher lease)."""
+        if self.leases is None:
+            return True
+        leader = self.leases.holds("watcher") or self.leases.claim("watcher")
+        if leader and not self._leader:
+            print("👀 Running the watch list in this process")
+            # Another process may have checked cases meanwhile: start from the stored state
+            with self._lock:
+                self._due.clear()
+                self._hearing.clear()
+                self._heap = []
+            self._sync_watch_list(conn)
+        self._leader = leader
+        return leader
+
+    def _sync_watch_list(self, conn):
+        """Schedule cases on watch_list that aren't yet; forget ones no longer on it."""
+        cases = {tuple(row) for row in conn.execute("SELECT case_type, case_number, case_year FROM watch_list")}
+        with self._lock:
+            known = set(self._due)
+            for case in known - cases:
+                self._due.pop(case, None)
+                self._hearing.pop(case, None)
+        for case in cases - known:
+            self._schedule_from_history(conn, case)
+
+    def _pop_due(self):
+        """Cases whose check is due, nearest hearing first."""
+        now = time.time()
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                when, _, case = heapq.heappop(self._heap)
+                if self._due.get(case) == when:
+                    due.append(case)
+            hearings = {case: self._hearing.get(case) for case in due}
+        # Hearings closest to now (just happened or about to) go first
+        due.sort(key=lambda case: abs(hearings[case] - now) if hearings[case] else float("inf"))
+        return due
+
+    def _push(self, case, due, hearing):
+        due += random.uniform(0, WATCH_SPREAD_SECONDS)
+        with self._lock:
+            self._due[case] = due
+            self._hearing[case] = hearing
+            heapq.heappush(self._heap, (due, hearing or 0.0, case))
+
+    def _latest(self, conn, case):
+        return conn.execute(
+            "SELECT status, next_date, last_date, court_no, checked_at FROM case_history WHERE case_type = ? AND case_number = ? AND case_year = ? AND status NOT LIKE 'Error:%' ORDER BY id DESC LIMIT 1",
+            case).fetchone()
+
+    def _schedule_from_history(self, conn, case, looked_at=None):
+        latest = self._latest(conn, case)
+        if latest is None:
+            # Never scraped: check right away
+            self._push(case, time.time() - WATCH_SPREAD_SECONDS, None)
+            return
+        looked_at = looked_at or _timestamp(latest[4]) or 0.0
+        self._push(case, next_check(latest[0], latest[1], looked_at), _hearing_timestamp(latest[1]))
+
+    def _check(self, case):
+        with self._lock:
+            if case not in self._due:
+                return  # removed meanwhile
+            self.stats["checks"] += 1
+        lease = case_key(*case) if self.leases is not None else None
+
+        def release():
+            if lease:
+                self.leases.release(lease)
+
+        def job():
+            # The lease goes when the check really ends, not when run_fn gives up waiting on it
+            try:
+                self._check_claimed(case)
+            except Exception:
+                get_connection(self.db_path).rollback()
+                raise
+            finally:
+                release()
+
+        try:
+            if lease and not self._claim(lease):
+                raise TimeoutError("another worker is still scraping this case")
+            self.run_fn(job, release)
+        except Exception as e:
+            print(f"Watch check error for {case}: {e}")
+            with self._lock:
+                self.stats["errors"] += 1
+            self._push(case, time.time() + WATCH_RECHECK_HOURS * 3600, self._hearing.get(case))
+
+    def _claim(self, lease):
+        """Take a case's scrape lease, waiting (up to LEASE_SECONDS) while a /scrape has it."""
+        deadline = time.monotonic() + LEASE_SECONDS
+        while not self.leases.claim(lease):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not self.leases.wait(lease, remaining):
+                return False
+        return True
+
+    def _check_claimed(self, case):
+        conn = get_connection(self.db_path)
+        case_info, engine = self.lookup_fn(*case)
+
+        latest = self._latest(conn, case)
+        old = dict(zip((column for column, _ in TRACKED_FIELDS), latest[:4])) if latest else {}
+        if case_info:
+            new = {column: case_info.get(key) for column, key in TRACKED_FIELDS}
+        else:
+            new = {"status": "Not Found", "next_date": None, "last_date": None, "court_no": None}
+        changes = {column: [old.get(column), value] for column, value in new.items() if old.get(column) != value}
+
+        # Only writes when the Orders page has something we don't
+        new_orders = store_orders(conn, *case, case_info.get("orders")) if case_info else []
+        if changes or new_orders:
+            # A new order moves pdf_link even when the tracked fields stay put
+            scraped_at = now_iso()
+            if case_info:
+                record_case(conn, *case, case_info, case_info.get("pdf_link"), scraped_at)
+            else:
+                record_status(conn, *case, "Not Found", scraped_at)
+        if new_orders:
+            changes["new_orders"] = len(new_orders)
+        if changes:
+            conn.execute("INSERT INTO case_changes (case_type, case_number, case_year, changed_at, changes) VALUES (?, ?, ?, ?, ?)",
+                         case + (now_iso(), json.dumps(changes)))
+            conn.commit()
+            print(f"🔔 {' '.join(case)} changed ({engine} engine): {changes}")
+            with self._lock:
+                self.stats["changed"] += 1
+            with self._events:
+                self._events.notify_all()
+        else:
+            with self._lock:
+                self.stats["unchanged"] += 1
+
+        self._schedule_from_history(conn, case, looked_at=time.time())
@@ -0,0 +1,126 @@
+"""
+Batch jobs stored in the shared database (project/batch.py):
+
+    python -m pytest tests
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from project import batch
+from project.batch import BatchJob, BatchRunner
+from project.db import get_connection, migrate
+from project.leases import LeaseTable
+
+CASES = [{"case_type": "CRL.A.", "case_number": str(n), "case_year": "2019"} for n in (1, 2, 3)]
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch, "BATCH_POLL_SECONDS", 0.05)
+    path = str(tmp_path / "history.db")
+    migrate(path)
+    return path
+
+
+def lookup(case_type, case_number, case_year):
+    time.sleep(0.1)
+    return {"success": True, "case_info": {"status": f"PENDING {case_number}"}}
+
+
+def in_other_process(db_path, code):
+    """Run `code` (with `job_id` set) in a fresh interpreter; returns what it prints as JSON"""
+    env = dict(os.environ, BATCH_POLL_SECONDS="0.05")
+    out = subprocess.run([sys.executable, "-c", f"import json\nfrom project.batch import BatchJob\n{code}"],
+                         cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def wait_done(job, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not job.done and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert job.done
+
+
+def add_job(db_path, cases, done_lines=()):
+    """An unfinished job as another worker would have stored it"""
+    conn = get_connection(db_path)
+    conn.execute("INSERT INTO batch_jobs (id, cases, created_at) VALUES (?, ?, ?)", ("dead", json.dumps(cases), time.time()))
+    for seq, line in enumerate(done_lines):
+        conn.execute("INSERT INTO batch_results (job_id, seq, line) VALUES (?, ?, ?)", ("dead", seq, json.dumps(line)))
+    conn.commit()
+
+
+def test_job_is_readable_from_another_process(db_path):
+    leases = LeaseTable(db_path)
+    runner = BatchRunner(lookup, max_parallel=2, db_path=db_path, leases=leases)
+    job = runner.submit(CASES + [None])
+    wait_done(job)
+
+    data = in_other_process(db_path, f"print(json.dumps(BatchJob.load({db_path!r}, {job.id!r}).to_dict()))")
+    local = job.to_dict()
+    assert data["status"] == "done"
+    assert data["results"] == local["results"]
+    assert (data["total"], data["completed"], data["failed"]) == (4, 4, 1)
+    assert data["finished_at"] == local["finished_at"]
+    # The claim goes with the finished job
+    assert not leases.held(job.lease_name)
+
+
+def test_stream_from_another_process_while_running(db_path):
+    runner = BatchRunner(lookup, max_parallel=1, db_path=db_path, leases=LeaseTable(db_path))
+    job = runner.submit(CASES)
+    code = f"job = BatchJob.load({db_path!r}, {job.id!r})\nprint(json.dumps([line['index'] for line in job.iter_results(timeout=5)]))"
+    indexes = in_other_process(db_path, code)
+    assert sorted(indexes) == [0, 1, 2]
+
+
+def test_unknown_job(db_path):
+    assert BatchJob.load(db_path, "nope") is None
+    assert BatchRunner(lookup, db_path=db_path).get("nope") is None
+
+
+def test_job_of_a_dead_worker_is_finished(db_path):
+    first = {"index": 0, **CASES[0], "result": {"success": True}}
+    add_job(db_path, CASES, [first])
+
+    job = BatchJob.load(db_path, "dead", LeaseTable(db_path))
+
+    assert job.done and job.finished_at
+    assert [line["index"] for line in job.results] == [0, 1, 2]
+    assert [line["result"]["success"] for line in job.results] == [True, False, False]
+    assert list(job.iter_results(timeout=1)) == job.results
+    # ...for every reader after that too
+    assert BatchJob.load(db_path, "dead").to_dict()["status"] == "done"
+
+
+def test_stream_of_a_live_remote_job_ends_when_idle(db_path):
+    add_job(db_path, CASES)
+    conn = get_connection(db_path)
+    conn.execute("INSERT INTO leases (name, owner, expires_at) VALUES ('batch:dead', 'other-host:1:x', ?)", (time.time() + 60,))
+    conn.commit()
+
+    job = BatchJob.load(db_path, "dead", LeaseTable(db_path))
+    assert not job.done
+    started = time.monotonic()
+    assert list(job.iter_results(timeout=0.3)) == []
+    assert time.monotonic() - started < 2
+
+
+def test_old_unfinished_jobs_are_purged(db_path, monkeypatch):
+    add_job(db_path, CASES, [{"index": 0, **CASES[0], "result": {"success": True}}])
+    monkeypatch.setattr(batch, "BATCH_MAX_RUN_SECONDS", -1)
+    BatchRunner(lookup, db_path=db_path).submit([None])
+
+    conn = get_connection(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM batch_jobs WHERE id = 'dead'").fetchone()[0] == 0
+    assert conn.execute("SELECT COUNT(*) FROM batch_results WHERE job_id = 'dead'").fetchone()[0] == 0
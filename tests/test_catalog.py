@@ -0,0 +1,35 @@
+"""
+The saved case type / year catalog (project/catalog.py):
+
+    python -m pytest tests
+"""
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from project.catalog import Catalog
+from project.config import COURT_BASE_URL
+
+SAVED = {"case_types": [{"value": "CRL.A.", "label": "CRL.A."}], "years": ["2019"]}
+
+
+def write_catalog(path, **fields):
+    path.write_text(json.dumps(dict(SAVED, fetched_at=time.time(), **fields)), encoding="utf-8")
+    return str(path)
+
+
+def test_catalog_from_this_site_is_used(tmp_path):
+    catalog = Catalog(write_catalog(tmp_path / "catalog.json", base_url=COURT_BASE_URL))
+    assert catalog.to_dict()["source"] == "site"
+    assert catalog.validate("WP(C)", "1207", "2019") == "Unknown case type: WP(C)."
+    assert catalog.validate("CRL.A.", "1207", "2019") is None
+
+
+def test_catalog_from_another_site_is_ignored(tmp_path):
+    # e.g. written by an app pointed at benchmarks/court_sim.py
+    for fields in ({"base_url": "http://127.0.0.1:5055"}, {}):
+        catalog = Catalog(write_catalog(tmp_path / "catalog.json", **fields))
+        assert catalog.to_dict()["source"] == "default"
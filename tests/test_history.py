@@ -0,0 +1,157 @@
+"""
+Change-only history and the compaction of old databases, on a temp SQLite file:
+
+    python -m pytest tests
+"""
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from project.compact import compact
+from project.db import migrate
+from project.history import record_case
+
+CASE = ("CRL.A.", "1207", "2019")
+CASE_INFO = {
+    "status": "PENDING",
+    "parties": "PETITIONER\nVS.\nSTATE",
+    "last_hearing_date": "2024-01-10",
+    "next_hearing_date": "2024-03-01",
+    "court_no": "30",
+}
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "history.db")
+    migrate(path)
+    return path
+
+
+def add_row(conn, status, scraped_at, parties="PETITIONER\nVS.\nSTATE", case=CASE):
+    """A row the way the app wrote them before change-only history (parties inline, no checked_at)"""
+    case_data = not status.startswith("Error:") and status != "Not Found"
+    conn.execute(
+        "INSERT INTO scrape_history (case_type, case_number, case_year, status, parties, last_date, next_date, court_no, pdf_link, scraped_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        case + (status, parties if case_data else None, "2024-01-10" if case_data else None, None,
+                "30" if case_data else None, None, scraped_at))
+
+
+def history(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute(
+            "SELECT status, parties, scraped_at, checked_at FROM case_history ORDER BY id").fetchall()
+    finally:
+        conn.close()
+
+
+def test_compact_collapses_repeats(db_path):
+    conn = sqlite3.connect(db_path)
+    add_row(conn, "PENDING", "2024-01-01 10:00:00")
+    add_row(conn, "PENDING", "2024-01-02 10:00:00")
+    add_row(conn, "PENDING", "2024-01-03 10:00:00")
+    add_row(conn, "DISPOSED", "2024-01-04 10:00:00")
+    conn.commit()
+    conn.close()
+
+    result = compact(db_path)
+
+    assert result["rows_before"] == 4
+    assert result["rows_after"] == 2
+    assert result["parties"] == 1
+    # The kept row carries the time of the last repeat
+    assert history(db_path) == [
+        ("PENDING", "PETITIONER\nVS.\nSTATE", "2024-01-01 10:00:00", "2024-01-03 10:00:00"),
+        ("DISPOSED", "PETITIONER\nVS.\nSTATE", "2024-01-04 10:00:00", "2024-01-04 10:00:00"),
+    ]
+
+
+def test_compact_drops_error_between_equal_answers(db_path):
+    conn = sqlite3.connect(db_path)
+    add_row(conn, "PENDING", "2024-01-01 10:00:00")
+    add_row(conn, "Error: timeout", "2024-01-02 10:00:00")
+    add_row(conn, "PENDING", "2024-01-03 10:00:00")
+    conn.commit()
+    conn.close()
+
+    compact(db_path)
+
+    assert history(db_path) == [
+        ("PENDING", "PETITIONER\nVS.\nSTATE", "2024-01-01 10:00:00", "2024-01-03 10:00:00"),
+    ]
+
+
+def test_compact_keeps_trailing_error(db_path):
+    conn = sqlite3.connect(db_path)
+    add_row(conn, "PENDING", "2024-01-01 10:00:00")
+    add_row(conn, "Error: timeout", "2024-01-02 10:00:00")
+    add_row(conn, "Error: 503", "2024-01-03 10:00:00")
+    conn.commit()
+    conn.close()
+
+    compact(db_path)
+
+    # Only the newest error of the run is kept
+    assert [row[0] for row in history(db_path)] == ["PENDING", "Error: 503"]
+
+
+def test_compact_keeps_cases_apart(db_path):
+    conn = sqlite3.connect(db_path)
+    add_row(conn, "PENDING", "2024-01-01 10:00:00")
+    add_row(conn, "PENDING", "2024-01-01 11:00:00", case=("FAO", "12", "2020"))
+    add_row(conn, "PENDING", "2024-01-02 10:00:00")
+    conn.commit()
+    conn.close()
+
+    assert compact(db_path)["rows_after"] == 2
+
+
+def test_compact_dry_run_writes_nothing(db_path):
+    conn = sqlite3.connect(db_path)
+    add_row(conn, "PENDING", "2024-01-01 10:00:00")
+    add_row(conn, "PENDING", "2024-01-02 10:00:00")
+    add_row(conn, "Error: timeout", "2024-01-03 10:00:00")
+    add_row(conn, "PENDING", "2024-01-04 10:00:00")
+    conn.commit()
+    before = conn.execute("SELECT rowid, * FROM scrape_history ORDER BY rowid").fetchall()
+    conn.close()
+
+    assert compact(db_path, dry_run=True) is None
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT rowid, * FROM scrape_history ORDER BY rowid").fetchall() == before
+    assert conn.execute("SELECT COUNT(*) FROM parties").fetchone()[0] == 0
+    conn.close()
+
+
+def test_record_case_unchanged_only_moves_checked_at(db_path):
+    conn = sqlite3.connect(db_path)
+    assert record_case(conn, *CASE, CASE_INFO, "https://example.org/1.pdf", "2024-01-01 10:00:00")
+    assert not record_case(conn, *CASE, dict(CASE_INFO), "https://example.org/1.pdf", "2024-01-02 10:00:00")
+    conn.commit()
+
+    assert conn.execute("SELECT COUNT(*) FROM scrape_history").fetchone()[0] == 1
+    assert conn.execute("SELECT COUNT(*) FROM parties").fetchone()[0] == 1
+    conn.close()
+    assert history(db_path) == [
+        ("PENDING", "PETITIONER\nVS.\nSTATE", "2024-01-01 10:00:00", "2024-01-02 10:00:00"),
+    ]
+
+
+def test_record_case_change_adds_row(db_path):
+    conn = sqlite3.connect(db_path)
+    record_case(conn, *CASE, CASE_INFO, "https://example.org/1.pdf", "2024-01-01 10:00:00")
+    # A new order moves pdf_link even though the case fields are the same
+    assert record_case(conn, *CASE, CASE_INFO, "https://example.org/2.pdf", "2024-01-02 10:00:00")
+    conn.commit()
+
+    rows = conn.execute("SELECT pdf_link, parties_id FROM scrape_history ORDER BY rowid").fetchall()
+    conn.close()
+    assert [row[0] for row in rows] == ["https://example.org/1.pdf", "https://example.org/2.pdf"]
+    assert rows[0][1] == rows[1][1]
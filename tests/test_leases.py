@@ -0,0 +1,86 @@
+"""
+Expiring claims in the shared database (project/leases.py):
+
+    python -m pytest tests
+"""
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from project.db import get_connection, migrate
+from project.leases import LeaseTable
+
+OTHER = "other-host:1:deadbeef"
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "history.db")
+    migrate(path)
+    return path
+
+
+def held_by_other(db_path, name, expires_in):
+    conn = get_connection(db_path)
+    conn.execute("INSERT OR REPLACE INTO leases (name, owner, expires_at) VALUES (?, ?, ?)", (name, OTHER, time.time() + expires_in))
+    conn.commit()
+
+
+def test_claim_is_exclusive_until_released(db_path):
+    leases = LeaseTable(db_path)
+    assert leases.claim("scrape:a")
+    assert not leases.claim("scrape:a")   # another thread of this process
+    assert leases.claim("scrape:b")       # other names don't block
+    assert leases.held("scrape:a")
+    leases.release("scrape:a")
+    assert not leases.held("scrape:a")
+    assert leases.claim("scrape:a")
+
+
+def test_other_owner_blocks_until_expiry(db_path):
+    leases = LeaseTable(db_path)
+    held_by_other(db_path, "scrape:a", 60)
+    assert not leases.acquire("scrape:a")
+    assert not leases.claim("scrape:a")
+    held_by_other(db_path, "scrape:a", -1)
+    assert not leases.held("scrape:a")
+    assert leases.claim("scrape:a")
+
+
+def test_wait(db_path):
+    leases = LeaseTable(db_path)
+    held_by_other(db_path, "scrape:a", 60)
+    started = time.monotonic()
+    assert not leases.wait("scrape:a", 0.3)
+    assert time.monotonic() - started >= 0.3
+    held_by_other(db_path, "scrape:a", 0.2)
+    assert leases.wait("scrape:a", 5)
+    assert leases.wait("scrape:free", 0)
+
+
+def test_claim_is_renewed_while_held(db_path):
+    leases = LeaseTable(db_path, ttl=0.3)
+    assert leases.claim("scrape:a")
+    time.sleep(1.0)
+    assert leases.held("scrape:a")
+    assert leases.snapshot()["renewed"] >= 2
+    leases.release("scrape:a")
+    assert not leases.held("scrape:a")
+
+
+def test_crashed_process_claim_lapses(db_path):
+    # A process that exits without releasing: its claim outlives it by the ttl only
+    subprocess.run([sys.executable, "-c",
+                    f"from project.leases import LeaseTable; assert LeaseTable({db_path!r}, ttl=0.5).claim('scrape:a')"],
+                   cwd=ROOT, check=True)
+    leases = LeaseTable(db_path)
+    assert leases.held("scrape:a")
+    assert not leases.claim("scrape:a")
+    assert leases.wait("scrape:a", 5)
+    assert leases.claim("scrape:a")
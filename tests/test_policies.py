@@ -0,0 +1,116 @@
+"""
+Cache freshness, watch-list scheduling and incremental order storage:
+
+    python -m pytest tests
+"""
+import sqlite3
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from project import cache_policy, watcher
+from project.cache_policy import evaluate
+from project.db import migrate
+from project.orders import fetch_orders, store_orders
+from project.watcher import next_check
+
+NOW = datetime(2024, 6, 1, 12, 0, tzinfo=timezone.utc)
+HOUR = 3600
+DAY = 24 * HOUR
+
+
+def ago(seconds):
+    return datetime.fromtimestamp(NOW.timestamp() - seconds, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+@pytest.mark.parametrize("status, age, state", [
+    ("DISPOSED", cache_policy.TTL_DISPOSED - 60, "fresh"),
+    ("DISPOSED", cache_policy.TTL_DISPOSED + 60, "stale"),
+    ("PENDING", cache_policy.TTL_PENDING - 60, "fresh"),
+    ("PENDING", cache_policy.TTL_PENDING + cache_policy.MAX_STALE + 60, "expired"),
+    ("Not Found", cache_policy.TTL_NEGATIVE - 60, "fresh"),
+    ("Error: timeout", cache_policy.TTL_ERROR + 60, "stale"),
+])
+def test_evaluate_ttls(status, age, state):
+    result = evaluate(status, ago(age), now=NOW)
+    assert result["state"] == state
+    assert result["age"] == age
+
+
+def test_evaluate_hearing_passed_since_scrape():
+    # Scraped last evening, within the TTL, but the hearing it listed is today
+    morning = datetime(2024, 6, 1, 6, 0, tzinfo=timezone.utc)
+    assert evaluate("PENDING", "2024-05-31 20:00:00", "2024-06-01", now=morning)["state"] == "stale"
+    assert evaluate("PENDING", "2024-05-31 20:00:00", "2024-06-10", now=morning)["state"] == "fresh"
+    # Only pending cases look at the hearing date
+    assert evaluate("DISPOSED", ago(HOUR), "2024-06-01", now=NOW)["state"] == "fresh"
+
+
+def test_evaluate_without_scraped_at():
+    assert evaluate("PENDING", None, now=NOW) == {"kind": "pending", "state": "stale", "age": None, "ttl": cache_policy.TTL_PENDING}
+
+
+def test_next_check_disposed_and_idle():
+    looked_at = NOW.timestamp()
+    assert next_check("DISPOSED", None, looked_at) == looked_at + watcher.WATCH_DISPOSED_DAYS * DAY
+    assert next_check("Not Found", None, looked_at) == looked_at + watcher.WATCH_IDLE_DAYS * DAY
+    assert next_check("PENDING", None, looked_at) == looked_at + watcher.WATCH_IDLE_DAYS * DAY
+
+
+def test_next_check_around_hearing():
+    hearing = datetime(2024, 6, 10, tzinfo=timezone.utc).timestamp()
+    before = hearing - watcher.WATCH_LEAD_HOURS * HOUR
+    after = hearing + watcher.WATCH_AFTER_HOURS * HOUR
+    # Well ahead: the day before; inside the lead window: after the hearing
+    assert next_check("PENDING", "2024-06-10", NOW.timestamp()) == before
+    assert next_check("PENDING", "2024-06-10", before + 60) == after
+    # Hearing passed and the site hasn't caught up yet
+    assert next_check("PENDING", "2024-06-10", after + 60) == after + 60 + watcher.WATCH_RECHECK_HOURS * HOUR
+
+
+@pytest.fixture
+def conn(tmp_path):
+    path = str(tmp_path / "history.db")
+    migrate(path)
+    conn = sqlite3.connect(path)
+    yield conn
+    conn.close()
+
+
+def order(n):
+    return {"order_date": f"2024-01-{n:02d}", "pdf_url": f"https://example.org/{n}.pdf", "label": "ORDER"}
+
+
+CASE = ("CRL.A.", "1207", "2019")
+
+
+def test_store_orders_only_adds_the_tail(conn):
+    assert store_orders(conn, *CASE, [order(1), order(2)]) == [order(1), order(2)]
+    assert store_orders(conn, *CASE, [order(1), order(2)]) == []
+    assert store_orders(conn, *CASE, [order(1), order(2), order(3)]) == [order(3)]
+    conn.commit()
+
+    stored = fetch_orders(conn, *CASE)
+    assert [item["pdf_url"] for item in stored] == [order(n)["pdf_url"] for n in (3, 2, 1)]
+
+
+def test_store_orders_empty_and_other_cases(conn):
+    assert store_orders(conn, *CASE, None) == []
+    assert store_orders(conn, *CASE, []) == []
+    store_orders(conn, *CASE, [order(1)])
+    # Orders are per case: the same PDF under another case is new there
+    assert store_orders(conn, "FAO", "12", "2020", [order(1)]) == [order(1)]
+
+
+def test_retry_attempts_at_least_one():
+    import os
+    import subprocess
+    code = "from project.ratelimit import RETRY_ATTEMPTS, polite_call; print(RETRY_ATTEMPTS, polite_call('http://court.test', lambda: 'ok'))"
+    for value in ("0", "-2"):
+        out = subprocess.run([sys.executable, "-c", code], cwd=Path(__file__).resolve().parent.parent,
+                             env=dict(os.environ, COURT_RETRY_ATTEMPTS=value), capture_output=True, text=True, check=True)
+        assert out.stdout.split() == ["1", "ok"]
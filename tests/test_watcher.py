@@ -0,0 +1,76 @@
+"""
+Watch-list checks and the leases they hold (project/watcher.py):
+
+    python -m pytest tests
+"""
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from project.db import get_connection, migrate
+from project.leases import LeaseTable, case_key
+from project.watcher import Watcher
+
+CASE = ("CRL.A.", "1207", "2019")
+CASE_INFO = {"status": "PENDING", "parties": "A VS. B", "next_hearing_date": "2030-01-01",
+             "last_hearing_date": "2024-01-01", "court_no": "3", "pdf_link": None, "orders": []}
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "history.db")
+    migrate(path)
+    return path
+
+
+def test_watcher_claim_outlives_a_long_check(db_path):
+    leases = LeaseTable(db_path, ttl=0.3)
+    watcher = Watcher(db_path, lambda *case: (CASE_INFO, "http"), leases=leases)
+    conn = get_connection(db_path)
+    assert watcher._lead(conn)
+    time.sleep(1.0)  # several ttls without calling _lead
+    assert leases.held("watcher")
+    assert watcher._lead(conn)
+
+
+def test_case_lease_held_until_the_job_ends(db_path):
+    leases = LeaseTable(db_path)
+    finished = threading.Event()
+
+    def slow_lookup(*case):
+        time.sleep(0.5)
+        return CASE_INFO, "http"
+
+    def gives_up(job, on_skip):
+        # Like the scrape executor timing out on a job that already started
+        def run():
+            try:
+                job()
+            finally:
+                finished.set()
+        threading.Thread(target=run).start()
+        raise TimeoutError("took too long")
+
+    watcher = Watcher(db_path, slow_lookup, leases=leases, run_fn=gives_up)
+    watcher.add([CASE])
+    watcher._check(CASE)
+
+    assert watcher.stats["errors"] == 1
+    assert leases.held(case_key(*CASE))       # the lookup is still running
+    assert finished.wait(5)
+    assert not leases.held(case_key(*CASE))
+    assert get_connection(db_path).execute("SELECT status FROM case_history").fetchall() == [("PENDING",)]
+
+
+def test_skipped_job_releases_the_case_lease(db_path):
+    leases = LeaseTable(db_path)
+    watcher = Watcher(db_path, lambda *case: (CASE_INFO, "http"), leases=leases,
+                      run_fn=lambda job, on_skip: on_skip())
+    watcher.add([CASE])
+    watcher._check(CASE)
+    assert not leases.held(case_key(*CASE))